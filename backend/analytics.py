@@ -0,0 +1,185 @@
+"""
+Materialized job analytics.
+
+Counters are kept in two small tables that are updated in the same
+transaction as every job write:
+
+- analytics_counters: number of jobs per status
+- analytics_daily: applications per UTC day (by application_date, falling
+  back to created_at), for the "this week" / "this month" windows
+
+Every write touches at most a handful of counter rows, and reading the
+dashboard sums at most a month of day buckets, however many jobs exist.
+
+Recompute the counters from the jobs table (and report any drift) with:
+
+    python analytics.py [--check]
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+
+# Statuses that mean an application was sent / answered
+NOT_APPLIED_STATUSES = {"saved"}
+RESPONSE_STATUSES = {"interview", "offer", "rejected"}
+
+MIGRATION = """
+CREATE TABLE analytics_counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE analytics_daily (
+    day TEXT PRIMARY KEY,
+    applications INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _application_day(job: Optional[Dict]) -> Optional[str]:
+    """UTC day an application counts towards, or None if not applied"""
+    if not job or job["status"] in NOT_APPLIED_STATUSES:
+        return None
+    return (job.get("application_date") or job["created_at"])[:10]
+
+
+def _bump(conn, table: str, key_column: str, value_column: str, key: str, delta: int):
+    conn.execute(
+        f"INSERT INTO {table} ({key_column}, {value_column}) VALUES (?, ?) "
+        f"ON CONFLICT ({key_column}) DO UPDATE SET {value_column} = {value_column} + ?",
+        (key, delta, delta),
+    )
+
+
+def record_job_change(conn, old: Optional[Dict], new: Optional[Dict]):
+    """
+    Apply one job write to the counters. old is None for a create and new is
+    None for a delete. Must run in the transaction that wrote the job.
+    """
+    old_status = old["status"] if old else None
+    new_status = new["status"] if new else None
+    if old_status != new_status:
+        if old_status:
+            _bump(conn, "analytics_counters", "name", "value", f"status:{old_status}", -1)
+        if new_status:
+            _bump(conn, "analytics_counters", "name", "value", f"status:{new_status}", 1)
+
+    old_day, new_day = _application_day(old), _application_day(new)
+    if old_day != new_day:
+        if old_day:
+            _bump(conn, "analytics_daily", "day", "applications", old_day, -1)
+        if new_day:
+            _bump(conn, "analytics_daily", "day", "applications", new_day, 1)
+
+
+def read_analytics(conn, today: Optional[date] = None) -> Dict:
+    """Dashboard numbers from the counters (calendar week and month, UTC)"""
+    today = today or datetime.now(timezone.utc).date()
+    status_counts = {
+        row[0][len("status:"):]: row[1]
+        for row in conn.execute(
+            "SELECT name, value FROM analytics_counters WHERE name LIKE 'status:%'"
+        )
+    }
+    total = sum(
+        count for status, count in status_counts.items()
+        if status not in NOT_APPLIED_STATUSES
+    )
+    responses = sum(status_counts.get(status, 0) for status in RESPONSE_STATUSES)
+
+    def applications_since(start: date) -> int:
+        row = conn.execute(
+            "SELECT IFNULL(SUM(applications), 0) FROM analytics_daily "
+            "WHERE day >= ? AND day <= ?",
+            (start.isoformat(), today.isoformat()),
+        ).fetchone()
+        return row[0]
+
+    return {
+        "total_applications": total,
+        "response_rate": round(100.0 * responses / total, 1) if total else 0.0,
+        "interviews_scheduled": status_counts.get("interview", 0),
+        "offers_received": status_counts.get("offer", 0),
+        "applications_this_week": applications_since(today - timedelta(days=today.weekday())),
+        "applications_this_month": applications_since(today.replace(day=1)),
+    }
+
+
+def _snapshot(conn) -> Dict[str, Dict[str, int]]:
+    return {
+        "counters": {
+            row[0]: row[1]
+            for row in conn.execute("SELECT name, value FROM analytics_counters")
+            if row[1]
+        },
+        "daily": {
+            row[0]: row[1]
+            for row in conn.execute("SELECT day, applications FROM analytics_daily")
+            if row[1]
+        },
+    }
+
+
+def rebuild_analytics(conn, write: bool = True) -> Dict[str, Dict]:
+    """
+    Recompute all counters with a full scan of the jobs table. Returns the
+    drift found as {table: {key: [stored, actual]}}; with write=False the
+    stored counters are left untouched.
+    """
+    stored = _snapshot(conn)
+    actual: Dict[str, Dict[str, int]] = {"counters": {}, "daily": {}}
+    for row in conn.execute("SELECT status, application_date, created_at FROM jobs"):
+        job = dict(row)
+        key = f"status:{job['status']}"
+        actual["counters"][key] = actual["counters"].get(key, 0) + 1
+        day = _application_day(job)
+        if day:
+            actual["daily"][day] = actual["daily"].get(day, 0) + 1
+
+    drift: Dict[str, Dict] = {}
+    for table in ("counters", "daily"):
+        for key in stored[table].keys() | actual[table].keys():
+            before, after = stored[table].get(key, 0), actual[table].get(key, 0)
+            if before != after:
+                drift.setdefault(table, {})[key] = [before, after]
+
+    if write:
+        conn.execute("DELETE FROM analytics_counters")
+        conn.execute("DELETE FROM analytics_daily")
+        conn.executemany(
+            "INSERT INTO analytics_counters (name, value) VALUES (?, ?)",
+            actual["counters"].items(),
+        )
+        conn.executemany(
+            "INSERT INTO analytics_daily (day, applications) VALUES (?, ?)",
+            actual["daily"].items(),
+        )
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recompute the materialized job analytics from scratch"
+    )
+    parser.add_argument("--database", help="SQLite file (default: DATABASE_PATH)")
+    parser.add_argument(
+        "--check", action="store_true", help="only report drift, do not rewrite"
+    )
+    args = parser.parse_args()
+
+    from storage import Storage
+
+    storage = Storage(args.database, pool_size=1)
+    storage.open()
+    try:
+        drift = asyncio.run(storage.rebuild_analytics(not args.check))
+    finally:
+        storage.close()
+    print(json.dumps(drift, indent=2, sort_keys=True) if drift else "No drift")
+    raise SystemExit(1 if drift and args.check else 0)
+
+
+if __name__ == "__main__":
+    main()
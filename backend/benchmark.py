@@ -0,0 +1,489 @@
+"""
+CV parser benchmark suite.
+
+Generates a reproducible corpus of PDF and DOCX CVs (page counts, table
+layouts, long skill sections and pathological inputs), times every parsing
+stage of each available engine over it and reports p50/p95 per stage and
+peak Python memory per engine. Results can be saved as a JSON baseline and
+later runs checked against it:
+
+    python benchmark.py                 # run and print the report
+    python benchmark.py --save          # run and store the baseline
+    python benchmark.py --check         # exit 1 when a stage regressed
+
+A stage regresses when its p95 exceeds the baseline's by more than
+--threshold (a ratio) plus --min-delta-ms, which keeps sub-millisecond
+stages from failing on timer noise. Baselines are machine specific; save
+one on the machine that runs the checks.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import tracemalloc
+import zipfile
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from cv_sections import segment_cv
+
+DEFAULT_BASELINE = Path(__file__).parent / "benchmark_baseline.json"
+DEFAULT_SEED = 1
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+DEFAULT_MIN_DELTA_MS = 1.0
+
+FIRST_NAMES = ["Jane", "John", "Priya", "Wei", "Carlos", "Amara", "Lukas", "Sofia", "Omar", "Hana"]
+LAST_NAMES = ["Doe", "Smith", "Sharma", "Chen", "Garcia", "Okafor", "Muller", "Rossi", "Haddad", "Sato"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+TITLES = ["Software Engineer", "Senior Developer", "Data Scientist", "DevOps Engineer", "Tech Lead"]
+SCHOOLS = ["State University", "Institute of Technology", "City College", "Polytechnic School"]
+DEGREES = ["Bachelor of Science in Computer Science", "Master of Science in Data Science", "MBA"]
+VERBS = ["Built", "Designed", "Led", "Migrated", "Optimized", "Automated", "Maintained", "Shipped"]
+
+
+# --- document writers ------------------------------------------------------
+
+def _pdf_string(text: str) -> str:
+    text = text.encode("latin-1", "replace").decode("latin-1")
+    return "(" + text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ")"
+
+
+def pdf_bytes(pages: List[List[Tuple[float, float, str]]]) -> bytes:
+    """A minimal PDF; each page is a list of (x, y, text) in points"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", "", "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in pages:
+        stream = "".join(
+            f"BT /F1 10 Tf {x:.1f} {y:.1f} Td {_pdf_string(text)} Tj ET\n" for x, y, text in page
+        )
+        objects.append(f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}endstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def pdf_from_lines(lines: List[str], lines_per_page: int = 60) -> bytes:
+    """Single-column PDF, lines_per_page lines per page"""
+    pages = [
+        [(50, 760 - 12 * i, line) for i, line in enumerate(lines[start:start + lines_per_page])]
+        for start in range(0, max(len(lines), 1), lines_per_page)
+    ]
+    return pdf_bytes(pages)
+
+
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+
+
+def _docx_paragraph(text: str) -> str:
+    return f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>'
+
+
+def _docx_block(block) -> str:
+    """A paragraph (str) or a table (list of rows of cells of blocks)"""
+    if isinstance(block, str):
+        return _docx_paragraph(block)
+    rows = "".join(
+        "<w:tr>" + "".join(
+            "<w:tc>" + "".join(_docx_block(b) for b in cell) + "</w:tc>" for cell in row
+        ) + "</w:tr>"
+        for row in block
+    )
+    return f"<w:tbl>{rows}</w:tbl>"
+
+
+def docx_bytes(blocks: List, header: Optional[List[str]] = None) -> bytes:
+    """A minimal DOCX with the given body blocks and an optional header"""
+    body = "".join(_docx_block(block) for block in blocks)
+    document = f'<?xml version="1.0" encoding="UTF-8"?><w:document {_W_NS}><w:body>{body}</w:body></w:document>'
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" ContentType='
+        '"application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    )
+    rels = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+        'relationships/officeDocument" Target="word/document.xml"/></Relationships>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        # Fixed timestamps keep the bytes (and so the corpus) reproducible
+        def write(name: str, data: str):
+            archive.writestr(zipfile.ZipInfo(name, (2020, 1, 1, 0, 0, 0)), data)
+
+        write("[Content_Types].xml", content_types)
+        write("_rels/.rels", rels)
+        write("word/document.xml", document)
+        if header:
+            write(
+                "word/header1.xml",
+                f"<w:hdr {_W_NS}>" + "".join(_docx_paragraph(line) for line in header) + "</w:hdr>",
+            )
+    return buffer.getvalue()
+
+
+# --- synthetic CVs ----------------------------------------------------------
+
+def _skill_names() -> List[str]:
+    from skill_matcher import DEFAULT_TAXONOMY_PATH
+
+    with open(DEFAULT_TAXONOMY_PATH) as f:
+        return sorted(json.load(f)["skills"])
+
+
+def _cv(rng: random.Random, skills: int = 15, jobs: int = 3, bullets: int = 4) -> Dict[str, List[str]]:
+    """Sections of a plausible CV; "contact" comes first and has no heading"""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    all_skills = _skill_names()
+    chosen = rng.sample(all_skills, min(skills, len(all_skills)))
+    experience = []
+    year = 2024
+    for _ in range(jobs):
+        start = year - rng.randint(1, 4)
+        experience.append(f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)}")
+        experience.append(f"Jan {start} - Dec {year}")
+        experience += [
+            f"- {rng.choice(VERBS)} services using {', '.join(rng.sample(chosen, min(3, len(chosen))))}"
+            for _ in range(bullets)
+        ]
+        year = start
+    return {
+        "contact": [
+            name,
+            f"{name.split()[0].lower()}@example.com | (555) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+            "Berlin, Germany",
+        ],
+        "Summary": [f"Engineer with {rng.randint(2, 15)}+ years of experience building software."],
+        "Experience": experience,
+        "Education": [f"{rng.choice(DEGREES)}", f"{rng.choice(SCHOOLS)}, {year - 4} - {year}"],
+        "Projects": [f"{rng.choice(VERBS)} an open source tool", "- Used by thousands of developers"],
+        "Skills": [", ".join(chosen[i:i + 8]) for i in range(0, len(chosen), 8)],
+    }
+
+
+def _lines(sections: Dict[str, List[str]]) -> List[str]:
+    lines = []
+    for heading, body in sections.items():
+        if heading != "contact":
+            lines += ["", heading]
+        lines += body
+    return lines
+
+
+def _two_column_pdf(sections: Dict[str, List[str]]) -> bytes:
+    """Sidebar layout: contact and skills on the left, the rest on the right"""
+    left = sections["contact"] + ["", "Skills"] + sections["Skills"]
+    right = _lines({k: v for k, v in sections.items() if k not in ("contact", "Skills")})
+    page = [(40, 760 - 12 * i, line[:40]) for i, line in enumerate(left)]
+    page += [(260, 760 - 12 * i, line) for i, line in enumerate(right[:60])]
+    return pdf_bytes([page])
+
+
+def _table_docx(sections: Dict[str, List[str]]) -> bytes:
+    """Whole CV laid out as a two-column table, as many templates do"""
+    rows = [
+        [[heading], body] for heading, body in sections.items() if heading != "contact"
+    ]
+    return docx_bytes([*sections["contact"], rows])
+
+
+def build_corpus(seed: int = DEFAULT_SEED) -> Dict[str, bytes]:
+    """File name -> content; the same seed always gives the same bytes"""
+    rng = random.Random(seed)
+    corpus: Dict[str, bytes] = {}
+    corpus["pdf_1_page.pdf"] = pdf_from_lines(_lines(_cv(rng)))
+    corpus["pdf_3_pages.pdf"] = pdf_from_lines(_lines(_cv(rng, skills=40, jobs=8, bullets=8)))
+    corpus["pdf_12_pages.pdf"] = pdf_from_lines(_lines(_cv(rng, skills=60, jobs=40, bullets=12)))
+    corpus["pdf_two_columns.pdf"] = _two_column_pdf(_cv(rng))
+    corpus["docx_plain.docx"] = docx_bytes(_lines(_cv(rng)))
+    corpus["docx_table_layout.docx"] = _table_docx(_cv(rng, skills=25))
+    sections = _cv(rng)
+    corpus["docx_header_contact.docx"] = docx_bytes(
+        _lines({k: v for k, v in sections.items() if k != "contact"}), header=sections["contact"]
+    )
+    corpus["docx_long_skills.docx"] = docx_bytes(_lines(_cv(rng, skills=800)))
+
+    # Pathological inputs
+    corpus["pdf_over_page_cap.pdf"] = pdf_from_lines(_lines(_cv(rng, skills=60, jobs=250, bullets=12)))
+    corpus["pdf_no_text.pdf"] = pdf_bytes([[]])
+    words = [rng.choice(VERBS + TITLES + COMPANIES) for _ in range(4000)]
+    corpus["pdf_one_long_line.pdf"] = pdf_bytes([[(50, 760, " ".join(words))]])
+    storm = _cv(rng)
+    storm["Experience"] = [
+        f"{rng.choice(TITLES)} {y % 100} - {y % 100 + 1}, {1990 + y % 30} - {1991 + y % 30} Mar 2001 to present"
+        for y in range(3000)
+    ]
+    corpus["docx_date_storm.docx"] = docx_bytes(_lines(storm))
+    flat = _cv(rng, skills=40)
+    corpus["docx_no_headings.docx"] = docx_bytes([line for body in flat.values() for line in body] * 20)
+    nested = _cv(rng)
+    table = [[[heading], body] for heading, body in nested.items()]
+    for _ in range(30):
+        table = [[["Section"], [table]]]
+    corpus["docx_nested_tables.docx"] = docx_bytes([table])
+    corpus["docx_unicode.docx"] = docx_bytes(
+        ["Zoë Ångström-Łukasiewicz", "zoe@例え.jp ☎ +49 30 1234 5678"]
+        + _lines({k: v for k, v in _cv(rng).items() if k != "contact"})
+        + ["Ελληνικά 中文 العربية emoji 🚀 " * 50]
+    )
+    return corpus
+
+
+def write_corpus(directory: Path, seed: int = DEFAULT_SEED) -> Dict[str, bytes]:
+    """Generate the corpus into directory (once per seed) and return it"""
+    directory.mkdir(parents=True, exist_ok=True)
+    corpus = build_corpus(seed)
+    for name, data in corpus.items():
+        path = directory / name
+        if not path.exists() or path.read_bytes() != data:
+            path.write_bytes(data)
+    return corpus
+
+
+# --- engines ----------------------------------------------------------------
+
+class _Timer:
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def __call__(self, stage: str, fn: Callable, *args, **kwargs):
+        start = perf_counter()
+        result = fn(*args, **kwargs)
+        self.timings[stage] = perf_counter() - start
+        return result
+
+
+def run_simple(parser, data: bytes, filename: str) -> Dict[str, float]:
+    """The stages of SimpleCVParser.parse_cv_bytes, timed one by one"""
+    timed = _Timer()
+    text = timed("extract_text", parser.extract_text, io.BytesIO(data), filename)
+    cv = timed("segment_cv", segment_cv, text)
+    personal_info = timed(
+        "extract_personal_info", parser.extract_personal_info, cv.scope("contact"), fallback_text=cv.text
+    )
+    skills = timed("extract_skills", parser.extract_skills, cv.scope("skills"))
+    timed("extract_experience", parser.extract_experience, cv.scope("contact", "summary", "experience"))
+    education = timed("extract_education", parser.extract_education, cv.scope("education"))
+    timed("extract_projects", parser.extract_projects, cv.section_text("projects"))
+    timed(
+        "analyze_ats_compatibility",
+        parser.analyze_ats_compatibility, cv.text, personal_info, skills, education,
+    )
+    return timed.timings
+
+
+def run_advanced(parser, data: bytes, filename: str) -> Dict[str, float]:
+    """
+    The stages of CVParser.parse_cv_bytes: the text is extracted once and
+    the engine pipeline (pyresparser over that text, then the simple
+    parser for missing fields, and the ATS analysis) is one stage
+    """
+    timed = _Timer()
+    document = timed(
+        "extract_text", parser.fallback_parser.load_document, io.BytesIO(data), filename
+    )
+    timed("segment_cv", lambda: document.segmented)
+    timed("parse_document", parser.parse_document, document)
+    return timed.timings
+
+
+def load_engines(names: List[str]) -> Dict[str, Tuple[object, Callable]]:
+    """Engine name -> (parser, runner), skipping engines that can't load"""
+    engines = {}
+    if "simple" in names:
+        from simple_cv_parser import SimpleCVParser
+
+        engines["simple"] = (SimpleCVParser(), run_simple)
+    if "advanced" in names:
+        try:
+            from cv_parser import CVParser
+
+            parser = CVParser()
+            if parser.spacy_available:
+                engines["advanced"] = (parser, run_advanced)
+            else:
+                print("⚠️ Skipping advanced engine: spaCy model not available")
+        except ImportError as e:
+            print(f"⚠️ Skipping advanced engine: {e}")
+    return engines
+
+
+# --- measurement ------------------------------------------------------------
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def benchmark_engine(parser, runner: Callable, corpus: Dict[str, bytes], repeat: int) -> Dict:
+    for name, data in corpus.items():  # warm-up: imports, regexes, caches
+        runner(parser, data, name)
+
+    samples: Dict[str, List[float]] = {}
+    documents: Dict[str, List[float]] = {}
+    for _ in range(repeat):
+        for name, data in corpus.items():
+            timings = runner(parser, data, name)
+            for stage, seconds in timings.items():
+                samples.setdefault(stage, []).append(seconds * 1000)
+            documents.setdefault(name, []).append(sum(timings.values()) * 1000)
+
+    # Memory is measured in its own pass: tracemalloc slows everything down
+    tracemalloc.start()
+    peak = 0
+    try:
+        for name, data in corpus.items():
+            tracemalloc.reset_peak()
+            runner(parser, data, name)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "stages": {
+            stage: {
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+            }
+            for stage, values in samples.items()
+        },
+        "documents": {name: round(percentile(values, 50), 3) for name, values in documents.items()},
+        "peak_memory_kb": peak // 1024,
+    }
+
+
+def run(engines: List[str], seed: int, repeat: int, corpus_dir: Optional[Path]) -> Dict:
+    corpus = write_corpus(corpus_dir, seed) if corpus_dir else build_corpus(seed)
+    from pdf_extract import available_backends
+
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "pdf_backends": available_backends(),
+        },
+        "seed": seed,
+        "repeat": repeat,
+        "corpus": {name: len(data) for name, data in corpus.items()},
+        "engines": {},
+    }
+    for name, (parser, runner) in load_engines(engines).items():
+        print(f"⏱️ Benchmarking {name} engine on {len(corpus)} documents x {repeat}")
+        results["engines"][name] = benchmark_engine(parser, runner, corpus, repeat)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """Regressions of results against baseline, as human-readable lines"""
+    regressions = []
+    for engine, current in results["engines"].items():
+        previous = baseline.get("engines", {}).get(engine)
+        if previous is None:
+            continue
+        for stage, stats in current["stages"].items():
+            before = previous["stages"].get(stage)
+            if before and stats["p95_ms"] > before["p95_ms"] * threshold + min_delta_ms:
+                regressions.append(
+                    f"{engine}.{stage}: p95 {stats['p95_ms']:.3f}ms "
+                    f"(baseline {before['p95_ms']:.3f}ms)"
+                )
+        before_kb = previous.get("peak_memory_kb")
+        if before_kb and current["peak_memory_kb"] > before_kb * threshold:
+            regressions.append(
+                f"{engine}: peak memory {current['peak_memory_kb']}KB (baseline {before_kb}KB)"
+            )
+    return regressions
+
+
+def print_report(results: Dict):
+    for engine, stats in results["engines"].items():
+        print(f"\n{engine} (peak memory {stats['peak_memory_kb']} KB)")
+        print(f"  {'stage':<28}{'p50 ms':>10}{'p95 ms':>10}")
+        for stage, values in stats["stages"].items():
+            print(f"  {stage:<28}{values['p50_ms']:>10.3f}{values['p95_ms']:>10.3f}")
+        print(f"  {'document':<28}{'p50 ms':>10}")
+        for name, value in stats["documents"].items():
+            print(f"  {name:<28}{value:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CV parsers on a synthetic corpus")
+    parser.add_argument(
+        "--engine", action="append", choices=["simple", "advanced"],
+        help="engine to benchmark, repeatable (default: both)",
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed passes over the corpus")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="corpus seed")
+    parser.add_argument(
+        "--corpus", type=Path,
+        help="directory to write the corpus to (default: kept in memory)",
+    )
+    parser.add_argument(
+        "--baseline", type=Path,
+        default=Path(os.getenv("CV_BENCHMARK_BASELINE", DEFAULT_BASELINE)),
+        help="baseline JSON file",
+    )
+    parser.add_argument("--save", action="store_true", help="store the results as the baseline")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regressions against the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed p95 ratio")
+    parser.add_argument(
+        "--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+        help="slack added to the allowed p95, for very fast stages",
+    )
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.engine or ["simple", "advanced"], args.seed, args.repeat, args.corpus)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"\n❌ No baseline at {args.baseline}; run with --save first")
+            raise SystemExit(2)
+        baseline = json.loads(args.baseline.read_text())
+        if baseline.get("seed") != args.seed:
+            print(f"\n⚠️ Baseline was recorded with seed {baseline.get('seed')}")
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print("\n❌ Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            raise SystemExit(1)
+        print("\n✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
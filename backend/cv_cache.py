@@ -0,0 +1,145 @@
+"""
+Content-addressed cache for parsed CV results.
+
+Entries are keyed by the SHA-256 of the uploaded bytes plus the parser
+engine and version, so re-uploading the same file skips parsing entirely.
+A bounded in-memory LRU sits in front of an optional SQLite tier that
+survives restarts. The async methods run SQLite reads and writes on a
+worker thread so they never block the event loop.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+def make_key(digest: str, parser_id: str) -> str:
+    """Cache key for a file digest parsed by a given parser/version"""
+    return f"{digest}:{parser_id}"
+
+
+class CVParseCache:
+    """Two-tier (memory LRU + optional SQLite) cache of parse results"""
+
+    def __init__(self, max_entries: Optional[int] = None, db_path: Optional[str] = None):
+        if max_entries is None:
+            max_entries = int(os.getenv("CV_CACHE_SIZE", "256"))
+        if db_path is None:
+            db_path = os.getenv("CV_CACHE_PATH") or None
+        self.max_entries = max(max_entries, 0)
+        self.db_path = db_path
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cv_parse_cache ("
+                " key TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached parse result for key, or None"""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload FROM cv_parse_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    async def get_async(self, key: str) -> Optional[Dict]:
+        """get() for the event loop: the SQLite tier is read on a thread"""
+        if self._db is None:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def put_async(self, key: str, result: Dict):
+        """put() for the event loop: the SQLite tier is written on a thread"""
+        if self._db is None:
+            self.put(key, result)
+        else:
+            await asyncio.to_thread(self.put, key, result)
+
+    def put(self, key: str, result: Dict):
+        """Store a parse result in both tiers"""
+        with self._lock:
+            self._remember(key, result)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO cv_parse_cache (key, payload, created_at)"
+                    " VALUES (?, ?, ?)",
+                    (key, json.dumps(result, default=str), time.time()),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, result: Dict):
+        if self.max_entries == 0:
+            return
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop every cached result"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cv_parse_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and tier sizes"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = None
+            if self._db is not None:
+                disk_entries = self._db.execute(
+                    "SELECT COUNT(*) FROM cv_parse_cache"
+                ).fetchone()[0]
+            return {
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups
+                if lookups
+                else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "max_memory_entries": self.max_entries,
+                "disk_entries": disk_entries,
+            }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,92 +1,163 @@
+import io
 import os
-import tempfile
 from pathlib import Path
-from typing import Dict
-
-import nltk
-import spacy
-from pyresparser import ResumeParser
+from typing import BinaryIO, Dict, Optional, Union
+
+from cv_pipeline import CircuitBreaker, CVDocument, Engine, TieredPipeline
+from model_registry import (
+    SPACY_MODEL,
+    configure_nltk_data,
+    get_spacy_model,
+    install_pyresparser_hooks,
+    shared_document,
+    warm_pyresparser_models,
+)
+from simple_cv_parser import SimpleCVParser
+from telemetry import CV_FALLBACKS, log, span
+
+# Wall-clock budget for one pyresparser run, in seconds
+ADVANCED_TIMEOUT = float(os.getenv("CV_ADVANCED_TIMEOUT", "20"))
+# Consecutive pyresparser failures/timeouts before it is skipped, and for how long
+BREAKER_FAILURES = int(os.getenv("CV_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("CV_BREAKER_COOLDOWN", "60"))
 
 
 class CVParser:
+    VERSION = "1.2"
+
     def __init__(self):
+        # Extracts the text once and is the last tier of the pipeline
+        self.fallback_parser = SimpleCVParser()
         self.setup_dependencies()
+        engines = []
+        if self.spacy_available:
+            engines.append(Engine(
+                "advanced",
+                self.parse_with_pyresparser,
+                timeout=ADVANCED_TIMEOUT,
+                breaker=CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN),
+                score=self.score_result,
+            ))
+        engines.append(Engine(
+            "simple", self.fallback_parser.parse_document, score=self.fallback_parser.score_result
+        ))
+        self.pipeline = TieredPipeline(engines)
 
     def setup_dependencies(self):
-        """Download required NLTK data and spaCy model if not present"""
+        """Resolve NLTK data and spaCy models locally (never downloads)"""
         self.spacy_available = False
         try:
-            # Download required NLTK data
-            nltk.download("punkt", quiet=True)
-            nltk.download("averaged_perceptron_tagger", quiet=True)
-            nltk.download("maxent_ne_chunker", quiet=True)
-            nltk.download("words", quiet=True)
-            nltk.download("stopwords", quiet=True)
-
-            # Check if spaCy model exists
+            # NLTK data comes from the vendored data directory; run setup.py
+            # to populate it. pyresparser reads stopwords at import time, so
+            # this must happen before it is imported.
+            missing = configure_nltk_data()
+            if missing:
+                log.warning("⚠️ NLTK data not found locally: %s", ", ".join(missing))
+                log.warning("Run: python setup.py")
+
+            from pyresparser import ResumeParser
+
+            self.resume_parser_class = ResumeParser
+
+            # Load the spaCy models once and share them with pyresparser
             try:
-                spacy.load("en_core_web_sm")
+                get_spacy_model(SPACY_MODEL)
+                install_pyresparser_hooks()
+                warm_pyresparser_models()
                 self.spacy_available = True
-                print("✅ spaCy model loaded successfully")
+                log.info("✅ spaCy model loaded successfully")
             except OSError:
-                print("⚠️ spaCy model 'en_core_web_sm' not found.")
-                print("Install with: python -m spacy download en_core_web_sm")
+                log.warning("⚠️ spaCy model '%s' not found.", SPACY_MODEL)
+                log.warning("Install with: python -m spacy download en_core_web_sm")
                 self.spacy_available = False
 
         except Exception as e:
-            print(f"Warning: Could not setup dependencies: {e}")
+            log.warning("Could not setup dependencies: %s", e)
             self.spacy_available = False
 
     def parse_cv(self, file_path: str) -> Dict:
         """
         Parse CV and extract structured information
         """
-        if not self.spacy_available:
-            # Fall back to simple parsing if spaCy is not available
-            print("⚠️ Using fallback parsing method (spaCy not available)")
-            from simple_cv_parser import SimpleCVParser
+        return self.parse_document(self.fallback_parser.load_document(file_path))
 
-            simple_parser = SimpleCVParser()
-            return simple_parser.parse_cv(file_path)
+    def parse_cv_bytes(self, file_content: bytes, filename: str) -> Dict:
+        """Parse CV from the uploaded bytes"""
+        return self.parse_document(
+            self.fallback_parser.load_document(io.BytesIO(file_content), filename)
+        )
 
-        try:
-            # Use pyresparser to extract information
-            data = ResumeParser(file_path).get_extracted_data()
-
-            # Structure the data for our application
-            parsed_data = {
-                "personal_info": {
-                    "name": data.get("name", ""),
-                    "email": data.get("email", ""),
-                    "mobile_number": data.get("mobile_number", ""),
-                },
-                "skills": {
-                    "technical_skills": data.get("skills", []),
-                    "all_skills": data.get("skills", []),
-                },
-                "experience": {
-                    "total_experience": data.get("total_experience", 0),
-                    "experience_details": [],  # pyresparser doesn't provide detailed experience
-                },
-                "education": {
-                    "degree": data.get("degree", []),
-                    "education_details": [],
-                },
-                "projects": [],  # pyresparser doesn't extract projects specifically
-                "ats_analysis": self.analyze_ats_compatibility(data),
-                "raw_data": data,  # Keep original parsed data
-            }
-
-            return parsed_data
+    def extract_contact_info(
+        self, source: Union[str, BinaryIO], filename: Optional[str] = None
+    ) -> Dict:
+        """Name, email and phone number, from the first PDF page when it has them"""
+        return self.fallback_parser.extract_contact_info(source, filename)
 
-        except Exception as e:
-            print(f"⚠️ pyresparser failed: {e}, falling back to simple parser")
-            from simple_cv_parser import SimpleCVParser
+    def parse_document(self, document: CVDocument) -> Dict:
+        """Run the engines over a CV whose text has been extracted once"""
+        if not document.text:
+            return self.fallback_parser.parse_document(document)
+        if not self.spacy_available:
+            log.debug("Using fallback parsing method (spaCy not available)")
+            CV_FALLBACKS.inc(reason="unavailable")
+        result = self.pipeline.parse(document)
+        if result is None:
+            return self.fallback_parser.get_empty_response("Error parsing CV: every engine failed")
+        if "error" not in result.get("raw_data", {}):
+            result["document_text"] = document.segmented.text
+        return result
+
+    def parse_with_pyresparser(self, document: CVDocument) -> Dict:
+        """pyresparser over the shared text; the file is not read again"""
+        # pyresparser takes the extension from the text after the first
+        # dot of the name; the content itself comes from shared_document
+        resume = io.BytesIO()
+        resume.name = f"resume{Path(document.filename).suffix.lower() or '.txt'}"
+        with shared_document(document.text, document.page_count), span("pyresparser"):
+            data = self.resume_parser_class(resume).get_extracted_data()
+        return self.structure_data(data)
+
+    def structure_data(self, data: Dict) -> Dict:
+        """Map pyresparser output onto the API response structure"""
+        with span("analyze_ats_compatibility"):
+            ats_analysis = self.analyze_ats_compatibility(data)
+        parsed_data = {
+            "personal_info": {
+                "name": data.get("name", ""),
+                "email": data.get("email", ""),
+                "mobile_number": data.get("mobile_number", ""),
+            },
+            "skills": {
+                "technical_skills": data.get("skills", []),
+                "all_skills": data.get("skills", []),
+            },
+            "experience": {
+                "total_experience": data.get("total_experience", 0),
+                "experience_details": [],  # pyresparser doesn't provide detailed experience
+            },
+            "education": {
+                "degree": data.get("degree", []),
+                "education_details": [],
+            },
+            "projects": [],  # pyresparser doesn't extract projects specifically
+            "ats_analysis": ats_analysis,
+            "raw_data": data,  # Keep original parsed data
+        }
+
+        return parsed_data
 
-            simple_parser = SimpleCVParser()
-            return simple_parser.parse_cv(file_path)
+    @classmethod
+    def score_result(cls, result: Dict) -> Dict:
+        """ATS analysis of a parse result (e.g. one merged from several engines)"""
+        return cls.analyze_ats_compatibility({
+            **result["personal_info"],
+            "skills": result["skills"].get("technical_skills", []),
+            "total_experience": result["experience"].get("total_experience", 0),
+            "degree": result["education"].get("degree", []),
+        })
 
-    def analyze_ats_compatibility(self, data: Dict) -> Dict:
+    @classmethod
+    def analyze_ats_compatibility(cls, data: Dict) -> Dict:
         """
         Analyze CV for ATS compatibility and provide feedback
         """
@@ -165,10 +236,11 @@ class CVParser:
         return {
             "score": min(score, max_score),
             "feedback": feedback,
-            "grade": self.get_ats_grade(score),
+            "grade": cls.get_ats_grade(score),
         }
 
-    def get_ats_grade(self, score: int) -> str:
+    @staticmethod
+    def get_ats_grade(score: int) -> str:
         """Convert score to letter grade"""
         if score >= 90:
             return "A+ (Excellent ATS compatibility)"
@@ -180,27 +252,3 @@ class CVParser:
             return "C (Fair ATS compatibility)"
         else:
             return "D (Needs improvement for ATS compatibility)"
-
-    def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
-        """Save uploaded file temporarily and return path"""
-        # Create uploads directory if it doesn't exist
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
-
-        # Create temporary file
-        suffix = Path(filename).suffix
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False, suffix=suffix, dir=upload_dir
-        )
-
-        temp_file.write(file_content)
-        temp_file.close()
-
-        return temp_file.name
-
-    def cleanup_file(self, file_path: str):
-        """Remove temporary file"""
-        try:
-            os.unlink(file_path)
-        except Exception:
-            pass  # Ignore cleanup errors
@@ -0,0 +1,237 @@
+"""
+Tiered CV parsing.
+
+A CV's text is extracted once into a CVDocument. Engines then run over
+that document in priority order (pyresparser first, then the regex
+parser), each within a wall-clock budget. The first engine to succeed
+provides the result; fields it left empty are filled from the engines
+after it, and the result's "provenance" records which engine produced
+each field. Engines that raised, timed out or were skipped by their
+breaker are listed in "engine_failures". The ATS analysis is not
+merged: when fields were filled in, the first engine scores the merged
+result again.
+
+An engine that keeps failing or timing out is skipped for a cooldown by
+its circuit breaker, so a bad spell of the advanced engine costs one
+cheap parse per CV instead of a timeout each. Breakers are per worker
+process.
+
+Timeouts interrupt the engine with SIGALRM when it runs on the main
+thread, as it does in the parser worker processes. Elsewhere (e.g.
+CV_PARSER_WORKERS=0) the engine runs on a helper thread that is abandoned
+once its budget is spent.
+"""
+
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from cv_sections import SegmentedCV, segment_cv
+from telemetry import CV_FALLBACKS, log, span
+
+# Dotted paths of the response fields merged across engines
+FIELDS = (
+    "personal_info.name",
+    "personal_info.email",
+    "personal_info.mobile_number",
+    "skills.technical_skills",
+    "skills.all_skills",
+    "experience.total_experience",
+    "experience.experience_details",
+    "education.degree",
+    "education.education_details",
+    "projects",
+)
+
+
+@dataclass
+class CVDocument:
+    """A CV's text, extracted once and shared by every engine"""
+
+    filename: str
+    text: str
+    page_count: Optional[int] = None
+    _segmented: Optional[SegmentedCV] = field(default=None, repr=False)
+
+    @property
+    def segmented(self) -> SegmentedCV:
+        if self._segmented is None:
+            with span("segment_cv"):
+                self._segmented = segment_cv(self.text)
+        return self._segmented
+
+
+class EngineTimeout(BaseException):
+    # A BaseException so broad "except Exception" handlers inside the
+    # engine can't swallow it
+    pass
+
+
+class CircuitBreaker:
+    """Open after `threshold` consecutive failures; retry one call after `cooldown`"""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            # Half-open: let this call through; its outcome decides
+            self.opened_at = None
+            self.failures = self.threshold - 1
+            return True
+        return False
+
+    def record(self, ok: bool):
+        if ok:
+            self.failures = 0
+            return
+        self.failures += 1
+        if self.threshold and self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+def call_with_timeout(function: Callable, seconds: Optional[float], *args):
+    """function(*args), or EngineTimeout once it has run for `seconds`"""
+    if not seconds:
+        return function(*args)
+    if threading.current_thread() is threading.main_thread() and hasattr(signal, "setitimer"):
+        def on_alarm(signum, frame):
+            raise EngineTimeout()
+
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, seconds)
+        try:
+            return function(*args)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cv-engine")
+    try:
+        return executor.submit(function, *args).result(timeout=seconds)
+    except FutureTimeout:
+        raise EngineTimeout()
+    finally:
+        executor.shutdown(wait=False)
+
+
+class Engine:
+    """
+    One parser tier: name, parse(document) -> result, budget and breaker,
+    and score(result) -> ATS analysis for results merged with later tiers
+    """
+
+    def __init__(
+        self,
+        name: str,
+        parse: Callable[[CVDocument], Dict],
+        timeout: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        score: Optional[Callable[[Dict], Dict]] = None,
+    ):
+        self.name = name
+        self.parse = parse
+        self.timeout = timeout
+        self.breaker = breaker
+        self.score = score
+
+    def run(self, document: CVDocument) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        (result, None), or (None, why) when the engine was skipped by its
+        breaker, raised or ran out of time
+        """
+        if self.breaker is not None and not self.breaker.allow():
+            return None, "circuit_open"
+        result, failure = None, None
+        try:
+            with span(f"engine_{self.name}"):
+                result = call_with_timeout(self.parse, self.timeout, document)
+        except EngineTimeout:
+            log.warning("⏱️ %s engine timed out after %ss", self.name, self.timeout)
+            failure = "timeout"
+        except Exception as e:
+            log.warning("⚠️ %s engine failed: %s", self.name, e)
+            failure = "error"
+        if self.breaker is not None:
+            self.breaker.record(failure is None)
+        return result, failure
+
+
+def _get(data: Dict, path: str):
+    for key in path.split("."):
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def _set(data: Dict, path: str, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        data = data.setdefault(key, {})
+    data[last] = value
+
+
+def _filled(value) -> bool:
+    return value not in (None, "", [], {}, 0, 0.0)
+
+
+def provenance(result: Dict, engine: str) -> Dict[str, str]:
+    """Provenance of a single-engine result: every non-empty field is its"""
+    return {path: engine for path in FIELDS + ("ats_analysis",) if _filled(_get(result, path))}
+
+
+class TieredPipeline:
+    """Run engines in priority order and merge their fields"""
+
+    def __init__(self, engines: List[Engine]):
+        self.engines = engines
+
+    def parse(self, document: CVDocument) -> Optional[Dict]:
+        """Merged result with provenance; None if every engine raised"""
+        merged: Optional[Dict] = None
+        base: Optional[Engine] = None
+        failed: Optional[Dict] = None
+        failures: Dict[str, str] = {}
+        sources: Dict[str, str] = {}
+        for i, engine in enumerate(self.engines):
+            result, failure = engine.run(document)
+            if failure:
+                failures[engine.name] = failure
+                if i + 1 < len(self.engines):
+                    CV_FALLBACKS.inc(reason=failure)
+                continue
+            if "error" in result.get("raw_data", {}):
+                failed = failed or result
+                continue
+            if merged is None:
+                merged, base = result, engine
+                sources = provenance(result, engine.name)
+            else:
+                for path in FIELDS:
+                    if path not in sources and _filled(_get(result, path)):
+                        _set(merged, path, _get(result, path))
+                        sources[path] = engine.name
+            if all(path in sources for path in FIELDS):
+                break
+        if merged is None:
+            # Every engine failed: the first error response, if any
+            return failed
+        if base.score is not None and any(sources[path] != base.name for path in sources):
+            # Score what is returned, not what the first engine found alone
+            merged["ats_analysis"] = base.score(merged)
+            sources["ats_analysis"] = base.name
+        merged["provenance"] = sources
+        if failures:
+            # A degraded result (e.g. an engine timed out): not worth caching
+            merged["engine_failures"] = failures
+        return merged
@@ -0,0 +1,135 @@
+"""
+Single-pass CV section segmentation.
+
+The extracted text is normalized once and split into sections (contact,
+summary, experience, education, projects, skills, ...) by one scan for
+heading lines. Extractors then only look at the section they need.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# Heading phrases per section; the text before the first heading is "contact"
+SECTION_HEADINGS: Dict[str, List[str]] = {
+    "summary": [
+        "summary", "professional summary", "profile", "professional profile",
+        "about", "about me", "objective", "career objective", "overview",
+    ],
+    "experience": [
+        "experience", "work experience", "professional experience",
+        "employment", "employment history", "work history", "career history",
+        "relevant experience", "industry experience",
+    ],
+    "education": [
+        "education", "academic background", "academic qualifications",
+        "qualifications", "education and training", "academic history",
+    ],
+    "projects": [
+        "projects", "personal projects", "key projects", "selected projects",
+        "academic projects", "side projects",
+    ],
+    "skills": [
+        "skills", "technical skills", "key skills", "core skills",
+        "core competencies", "competencies", "technologies",
+        "skills and tools", "skills & tools", "tech stack", "expertise",
+    ],
+    "certifications": ["certifications", "certificates", "licenses"],
+    "awards": ["awards", "honors", "honours", "achievements"],
+    "publications": ["publications", "research"],
+    "languages": ["languages"],
+    "interests": ["interests", "hobbies", "hobbies and interests"],
+    "volunteering": ["volunteering", "volunteer experience"],
+    "references": ["references"],
+}
+
+_HEADING_TO_SECTION = {
+    heading: section
+    for section, headings in SECTION_HEADINGS.items()
+    for heading in headings
+}
+
+# A heading is a line holding only a known heading phrase, optionally
+# decorated with a markdown "#", a trailing colon or surrounding dashes
+_HEADING_PATTERN = re.compile(
+    r"^[ \t]*(?:#+[ \t]*)?[-=_*•]*[ \t]*(?P<heading>"
+    + "|".join(
+        r"[ \t]+".join(re.escape(word) for word in h.split())
+        for h in sorted(_HEADING_TO_SECTION, key=len, reverse=True)
+    )
+    + r")[ \t]*:?[ \t]*[-=_*#]*[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+_HORIZONTAL_SPACE = re.compile(r"[ \t\f\v\u00a0\u2000-\u200b\u3000]+")
+_TRAILING_SPACE = re.compile(r"[ \t]+\n")
+_EXCESS_BLANK_LINES = re.compile(r"\n{3,}")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize line endings and horizontal whitespace in one pass each"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    text = _HORIZONTAL_SPACE.sub(" ", text)
+    text = _TRAILING_SPACE.sub("\n", text)
+    return _EXCESS_BLANK_LINES.sub("\n\n", text).strip()
+
+
+@dataclass
+class Section:
+    name: str
+    heading: str
+    start: int  # offset of the section body (after the heading line)
+    end: int
+
+
+@dataclass
+class SegmentedCV:
+    text: str
+    sections: List[Section] = field(default_factory=list)
+
+    def section_text(self, *names: str) -> str:
+        """Body text of the named sections, in document order"""
+        return "\n".join(
+            self.text[s.start:s.end].strip()
+            for s in self.sections
+            if s.name in names
+        ).strip()
+
+    def scope(self, *names: str) -> str:
+        """Text of the named sections, or the whole CV if none were found"""
+        if any(s.name in names for s in self.sections):
+            return self.section_text(*names)
+        return self.text
+
+    def offsets(self) -> Dict[str, List[List[int]]]:
+        """Section name -> [start, end] offsets, for the API response"""
+        result: Dict[str, List[List[int]]] = {}
+        for s in self.sections:
+            result.setdefault(s.name, []).append([s.start, s.end])
+        return result
+
+
+def segment_cv(text: str, normalize: bool = True) -> SegmentedCV:
+    """
+    Normalize CV text and split it into sections with offsets. With
+    normalize=False the offsets refer to the text exactly as given.
+    """
+    if normalize:
+        text = normalize_text(text)
+    cv = SegmentedCV(text=text)
+
+    position = 0
+    current_name, current_heading = "contact", ""
+    for match in _HEADING_PATTERN.finditer(text):
+        if match.start() > position or current_name != "contact":
+            cv.sections.append(
+                Section(current_name, current_heading, position, match.start())
+            )
+        heading = " ".join(match.group("heading").split())
+        current_name = _HEADING_TO_SECTION[heading.lower()]
+        current_heading = heading
+        position = match.end()
+
+    if len(text) > position or current_name != "contact":
+        cv.sections.append(Section(current_name, current_heading, position, len(text)))
+    return cv
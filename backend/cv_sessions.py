@@ -0,0 +1,195 @@
+"""
+Server-side CV documents for live editing.
+
+Parsing a single upload opens a session holding the CV's normalized text,
+its section offsets and the extracted fields. POST /api/cv/{cv_id}/rescore
+applies text edits to it, re-segments the text (one scan for headings)
+and re-runs only the extractors whose input text changed before
+recomputing the ATS analysis, so an edit costs milliseconds instead of an
+upload and a full parse.
+
+Re-extraction runs the regex parser (SimpleCVParser) in the API process;
+it is built on a worker thread at startup. Fields of sections that were
+not edited keep the engine that produced them, as recorded in
+"provenance", and the ATS analysis is recomputed by the scorer of the
+engine that first produced it, so an edit that changes nothing leaves
+the score alone. Sessions live in memory, at most
+CV_SESSION_SIZE of them, and expire CV_SESSION_TTL seconds after their
+last use.
+"""
+
+import asyncio
+import copy
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from cv_parser import CVParser
+from cv_pipeline import provenance
+from cv_sections import SegmentedCV, segment_cv
+from simple_cv_parser import EMAIL_PATTERN, PHONE_PATTERNS, SimpleCVParser
+from telemetry import span
+
+SESSION_SIZE = int(os.getenv("CV_SESSION_SIZE", "256"))
+SESSION_TTL = float(os.getenv("CV_SESSION_TTL", "1800"))
+
+# Extractor per response field, called with the arguments from
+# _extractor_inputs(); mirrors SimpleCVParser.parse_segmented
+_EXTRACTORS = {
+    "personal_info": lambda parser, contact, text: parser.extract_personal_info(
+        contact, fallback_text=text
+    ),
+    "skills": SimpleCVParser.extract_skills,
+    "experience": SimpleCVParser.extract_experience,
+    "education": SimpleCVParser.extract_education,
+    "projects": SimpleCVParser.extract_projects,
+}
+
+# ATS scorer per engine, keyed by the "ats_analysis" provenance
+_SCORERS = {
+    "advanced": CVParser.score_result,
+    "simple": SimpleCVParser.score_result,
+}
+
+
+class VersionConflict(Exception):
+    def __init__(self, version: int):
+        super().__init__(f"The CV has changed; its current version is {version}")
+        self.version = version
+
+
+def _extractor_inputs(cv: SegmentedCV) -> Dict[str, Tuple[str, ...]]:
+    """The text each extractor reads, per response field"""
+    return {
+        "personal_info": (cv.scope("contact"), cv.text),
+        "skills": (cv.scope("skills"),),
+        "experience": (cv.scope("contact", "summary", "experience"),),
+        "education": (cv.scope("education"),),
+        "projects": (cv.section_text("projects"),),
+    }
+
+
+def _changed(name: str, old: Tuple[str, ...], new: Tuple[str, ...]) -> bool:
+    if name == "personal_info" and old[0] == new[0]:
+        # The rest of the CV is only searched for an email or phone number
+        # missing from the contact section
+        contact = new[0]
+        if EMAIL_PATTERN.search(contact) and any(p.search(contact) for p in PHONE_PATTERNS):
+            return False
+    return old != new
+
+
+class CVSession:
+    """A parsed CV kept for editing: text, sections and extracted fields"""
+
+    def __init__(self, text: str, result: Dict):
+        self.id = uuid.uuid4().hex
+        self.version = 0
+        self.text = text
+        self.result = copy.deepcopy(result)
+        self.result.pop("document_text", None)
+        self.cv = segment_cv(text, normalize=False)
+        self.inputs = _extractor_inputs(self.cv)
+        self.used_at = time.monotonic()
+
+    def apply(self, parser: SimpleCVParser, edits: List[Tuple[int, int, str]]) -> List[str]:
+        """
+        Replace text[start:end] for each edit, in order and each against
+        the text left by the previous one; re-extract the fields whose
+        sections changed and rescore. Returns the re-extracted fields.
+        """
+        text = self.text
+        for start, end, replacement in edits:
+            if not 0 <= start <= end <= len(text):
+                raise ValueError(
+                    f"Edit {start}-{end} is outside the text (length {len(text)})"
+                )
+            text = text[:start] + replacement + text[end:]
+
+        with span("segment_cv"):
+            cv = segment_cv(text, normalize=False)
+        inputs = _extractor_inputs(cv)
+        sources = self.result.setdefault("provenance", {})
+        changed = [name for name in _EXTRACTORS if _changed(name, self.inputs[name], inputs[name])]
+        for name in changed:
+            with span(f"extract_{name}"):
+                self.result[name] = _EXTRACTORS[name](parser, *inputs[name])
+            for path in [p for p in sources if p.split(".")[0] == name]:
+                del sources[path]
+            sources.update(provenance({name: self.result[name]}, "simple"))
+
+        scorer = sources.setdefault("ats_analysis", "simple")
+        with span("analyze_ats_compatibility"):
+            self.result["ats_analysis"] = _SCORERS[scorer](self.result)
+        self.result["raw_data"].update(
+            extracted_text=text[:500] + "..." if len(text) > 500 else text,
+            sections=cv.offsets(),
+        )
+        self.text, self.cv, self.inputs = text, cv, inputs
+        self.version += 1
+        return changed
+
+    def to_dict(self) -> Dict:
+        return {
+            "cv_id": self.id,
+            "version": self.version,
+            "text": self.text,
+            "sections": self.cv.offsets(),
+            **self.result,
+        }
+
+
+class CVSessionStore:
+    """In-memory LRU of CV sessions with an idle timeout"""
+
+    def __init__(self, max_sessions: int = SESSION_SIZE, ttl: float = SESSION_TTL):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, CVSession]" = OrderedDict()
+        self._parser: "Optional[asyncio.Future[SimpleCVParser]]" = None
+
+    def start(self):
+        """Build the re-extraction parser (it compiles the skill taxonomy) on a worker thread"""
+        if self.max_sessions > 0 and self._parser is None:
+            self._parser = asyncio.ensure_future(asyncio.to_thread(SimpleCVParser))
+
+    def open(self, text: str, result: Dict) -> Optional[CVSession]:
+        """Keep a parsed CV for editing; None when sessions are disabled"""
+        if self.max_sessions <= 0:
+            return None
+        self._expire()
+        session = CVSession(text, result)
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def get(self, cv_id: str) -> Optional[CVSession]:
+        self._expire()
+        session = self._sessions.get(cv_id)
+        if session is not None:
+            session.used_at = time.monotonic()
+            self._sessions.move_to_end(cv_id)
+        return session
+
+    async def rescore(
+        self, session: CVSession, edits: List[Tuple[int, int, str]], version: Optional[int] = None
+    ) -> List[str]:
+        """Apply edits to a session; VersionConflict if it moved past `version`"""
+        self.start()
+        parser = await self._parser
+        if version is not None and version != session.version:
+            raise VersionConflict(session.version)
+        with span("cv_rescore"):
+            return session.apply(parser, edits)
+
+    def _expire(self):
+        """Drop sessions idle for longer than the TTL (least recently used first)"""
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if now - session.used_at <= self.ttl:
+                break
+            del self._sessions[session.id]
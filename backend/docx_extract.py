@@ -0,0 +1,174 @@
+"""
+Streaming text extraction for Word documents.
+
+A .docx file is a zip of XML parts. The body, headers and footers are
+streamed out of the zip and through an incremental XML parser, so only the
+paragraph being read is held in memory and nothing but text is built.
+Tables, text boxes and header/footer contact details are covered, which
+python-docx's ``doc.paragraphs`` skips.
+
+Legacy binary .doc files are converted with antiword when it is installed
+(CV_DOC_CONVERTER); otherwise they are rejected up front with a clear
+error. sniff_format() tells the formats apart from the first bytes of a
+file, whatever its extension says.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from typing import BinaryIO, List, Optional, Union
+from xml.etree.ElementTree import iterparse
+
+DOC_CONVERTER = os.getenv("CV_DOC_CONVERTER", "antiword")
+DOC_CONVERT_TIMEOUT = float(os.getenv("CV_DOC_CONVERT_TIMEOUT", "20"))
+
+# Bytes of a file needed by sniff_format()
+SNIFF_BYTES = 1024
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ZIP_MAGIC = b"PK\x03\x04"
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+_HEADER_PART = re.compile(r"^word/header\d*\.xml$")
+_FOOTER_PART = re.compile(r"^word/footer\d*\.xml$")
+_PART_NUMBER = re.compile(r"\d+")
+
+
+class UnsupportedDocument(ValueError):
+    """A CV in a format that can't be read here"""
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """The container format of a file from its first bytes: pdf, zip, ole or None"""
+    if head.startswith(OLE_MAGIC):
+        return "ole"
+    if head.startswith(ZIP_MAGIC):
+        return "zip"
+    if b"%PDF-" in head[:SNIFF_BYTES]:
+        return "pdf"
+    return None
+
+
+def doc_converter() -> Optional[str]:
+    """Path of the legacy .doc converter, when one is installed"""
+    return shutil.which(DOC_CONVERTER) if DOC_CONVERTER else None
+
+
+def check_format(filename: str, head: bytes):
+    """Raise UnsupportedDocument when a CV's content can't be parsed"""
+    extension = os.path.splitext(filename)[1].lower()
+    kind = sniff_format(head)
+    if extension == ".pdf" and kind != "pdf":
+        raise UnsupportedDocument(f"{filename} is not a valid PDF file")
+    if extension == ".docx" and kind != "zip":
+        raise UnsupportedDocument(f"{filename} is not a valid DOCX file")
+    if extension == ".doc":
+        if kind == "ole" and doc_converter() is None:
+            raise UnsupportedDocument(
+                "Legacy .doc files are not supported; save the CV as DOCX or PDF"
+            )
+        if kind not in ("ole", "zip"):
+            raise UnsupportedDocument(f"{filename} is not a valid Word document")
+
+
+def _part_order(name: str):
+    number = _PART_NUMBER.search(name.rsplit("/", 1)[-1])
+    return int(number.group()) if number else 0
+
+
+def _docx_parts(archive: zipfile.ZipFile) -> List[str]:
+    """Headers first (they often hold contact details), then body, then footers"""
+    names = archive.namelist()
+    headers = sorted((n for n in names if _HEADER_PART.match(n)), key=_part_order)
+    footers = sorted((n for n in names if _FOOTER_PART.match(n)), key=_part_order)
+    return headers + ["word/document.xml"] + footers
+
+
+def _part_lines(stream) -> List[str]:
+    """Paragraph texts of one WordprocessingML part, in document order"""
+    lines: List[str] = []
+    paragraphs: List[List[str]] = []  # open paragraphs; text boxes nest them
+    skip = 0  # depth inside mc:Fallback, which repeats the mc:Choice content
+    for event, elem in iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if tag == MC_FALLBACK:
+            skip += 1 if event == "start" else -1
+            continue
+        if skip:
+            if event == "end":
+                elem.clear()
+            continue
+        if event == "start":
+            if tag == f"{W}p":
+                paragraphs.append([])
+            continue
+        if tag == f"{W}t" and paragraphs:
+            paragraphs[-1].append(elem.text or "")
+        elif tag == f"{W}tab" and paragraphs:
+            paragraphs[-1].append("\t")
+        elif tag in (f"{W}br", f"{W}cr") and paragraphs:
+            paragraphs[-1].append("\n")
+        elif tag == f"{W}p":
+            lines.append("".join(paragraphs.pop()))
+            elem.clear()
+        elif tag == f"{W}tbl" and not paragraphs:
+            elem.clear()
+    return lines
+
+
+def extract_docx(source: Union[str, BinaryIO]) -> str:
+    """Text of a .docx path or file object, one line per paragraph"""
+    lines: List[str] = []
+    with zipfile.ZipFile(source) as archive:
+        names = set(archive.namelist())
+        for part in _docx_parts(archive):
+            if part in names:
+                with archive.open(part) as stream:
+                    lines.extend(_part_lines(stream))
+    return "".join(line + "\n" for line in lines)
+
+
+def extract_doc(source: Union[str, BinaryIO]) -> str:
+    """Text of a legacy .doc file, through the external converter"""
+    converter = doc_converter()
+    if converter is None:
+        raise UnsupportedDocument(
+            "Legacy .doc files are not supported; save the CV as DOCX or PDF"
+        )
+    path, temp_path = source, None
+    if not isinstance(source, (str, os.PathLike)):
+        from simple_cv_parser import get_temp_dir
+
+        source.seek(0)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".doc", dir=get_temp_dir()) as f:
+            shutil.copyfileobj(source, f)
+            path = temp_path = f.name
+    try:
+        result = subprocess.run(
+            [converter, "-m", "UTF-8.txt", "-w", "0", os.fspath(path)],
+            capture_output=True,
+            timeout=DOC_CONVERT_TIMEOUT,
+            check=True,
+        )
+    finally:
+        if temp_path:
+            os.unlink(temp_path)
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+def extract_word_text(source: Union[str, BinaryIO]) -> str:
+    """Text of a .doc or .docx file, dispatching on its content"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            head = f.read(len(OLE_MAGIC))
+    else:
+        source.seek(0)
+        head = source.read(len(OLE_MAGIC))
+        source.seek(0)
+    if sniff_format(head) == "ole":
+        return extract_doc(source)
+    return extract_docx(source)
@@ -0,0 +1,218 @@
+"""
+Bulk job import and streaming export.
+
+Imports read the request body as it arrives and parse CSV or NDJSON one
+record at a time. Records are validated against the Job model and written
+in batches, one transaction per batch, skipping rows that duplicate an
+existing job (same job_url, or same company and position when there is
+no URL). Exports page through the jobs table with the keyset cursor and
+stream each page out as it is read.
+"""
+
+import codecs
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from storage import JOB_FIELDS
+
+IMPORT_BATCH_SIZE = int(os.getenv("JOB_IMPORT_BATCH_SIZE", "500"))
+IMPORT_MAX_BYTES = int(os.getenv("JOB_IMPORT_MAX_BYTES", str(100 * 1024 * 1024)))
+EXPORT_PAGE_SIZE = 500
+
+# Rows listed individually in the import report (counts are always exact)
+MAX_REPORTED_ROWS = 1000
+
+EXPORT_COLUMNS = ["id", *JOB_FIELDS, "created_at", "updated_at"]
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def format_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream incrementally and yield lines with their endings"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()  # incomplete last line
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _csv_column(name: str) -> str:
+    return "_".join(name.strip().lower().split())
+
+
+async def iter_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    """
+    Yield (row number, record) for each CSV data row. The first row is the
+    header; empty cells are left out so model defaults apply. Quoted fields
+    may span lines.
+    """
+    header: Optional[List[str]] = None
+    record, quotes, number = "", 0, 0
+    async for line in iter_lines(chunks):
+        record += line
+        quotes += line.count('"')
+        if quotes % 2:
+            continue  # inside a quoted field that continues on the next line
+        values = next(csv.reader([record]), [])
+        record, quotes = "", 0
+        if not any(value.strip() for value in values):
+            continue
+        if header is None:
+            header = [_csv_column(name) for name in values]
+            continue
+        number += 1
+        yield number, {
+            column: value.strip()
+            for column, value in zip(header, values)
+            if column and value.strip()
+        }
+    if record.strip() and header is not None:
+        number += 1
+        yield number, ValueError("Unterminated quoted field")
+
+
+async def iter_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    """Yield (line number, record) for each non-empty NDJSON line"""
+    number = 0
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield number, ValueError("Each line must be a JSON object")
+            continue
+        yield number, record
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}"
+            for e in error.errors()
+        )
+    return str(error)
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.rows: List[Dict] = []
+
+    def add(self, row: int, status: str, **details):
+        if status == "duplicate":
+            self.duplicates += 1
+        elif status == "invalid":
+            self.invalid += 1
+        if len(self.rows) < MAX_REPORTED_ROWS:
+            self.rows.append({"row": row, "status": status, **details})
+
+    def to_dict(self) -> Dict:
+        return {
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "rows": sorted(self.rows, key=lambda row: row["row"]),
+            "rows_truncated": self.duplicates + self.invalid > len(self.rows),
+        }
+
+
+async def import_jobs(
+    storage, model, records: AsyncIterator[Tuple[int, Dict]],
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> Dict:
+    """
+    Validate and store jobs in batches. Returns counts plus the rows that
+    were skipped as duplicates or rejected as invalid.
+    """
+    adapter = TypeAdapter(List[model])
+    report = ImportReport()
+    batch: List[Tuple[int, Dict]] = []
+
+    async def flush():
+        numbers = [number for number, _ in batch]
+        try:
+            jobs = adapter.validate_python([record for _, record in batch])
+            valid = list(zip(numbers, jobs))
+        except ValidationError:
+            # Fall back to one-by-one validation to find the bad rows
+            valid = []
+            for number, record in batch:
+                try:
+                    valid.append((number, model.model_validate(record)))
+                except ValidationError as e:
+                    report.add(number, "invalid", error=_error_message(e))
+        if valid:
+            results = await storage.import_jobs([job.model_dump() for _, job in valid])
+            for (number, _), (job_id, duplicate_of) in zip(valid, results):
+                if duplicate_of:
+                    report.add(number, "duplicate", duplicate_of=duplicate_of)
+                else:
+                    report.imported += 1
+        batch.clear()
+
+    async for number, record in records:
+        if isinstance(record, Exception):
+            report.add(number, "invalid", error=_error_message(record))
+            continue
+        batch.append((number, record))
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return report.to_dict()
+
+
+def _csv_line(values: List) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(values)
+    return buffer.getvalue()
+
+
+async def export_jobs(storage, fmt: str, filters: Optional[Dict] = None) -> AsyncIterator[str]:
+    """Stream all matching jobs, oldest first, one page in memory at a time"""
+    if fmt == "csv":
+        yield _csv_line(EXPORT_COLUMNS)
+    cursor = None
+    while True:
+        jobs, cursor = await storage.list_jobs(
+            filters, "created_at", False, EXPORT_PAGE_SIZE, cursor
+        )
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for job in jobs:
+                writer.writerow(["" if job[c] is None else job[c] for c in EXPORT_COLUMNS])
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(job) + "\n" for job in jobs)
+        if cursor is None:
+            break
@@ -0,0 +1,203 @@
+"""
+Ranking saved jobs against a candidate's skills.
+
+Each job's position and description are run through the skill taxonomy
+matcher once, when the job is written, and the resulting skill counts are
+stored in job_vectors together with the jobs collection version of the
+write. The ranker keeps every job's vector in memory as a sparse
+(CSR-style) matrix and, on each request, only re-reads the vectors written
+since the version it last saw.
+
+Scoring is one vectorized pass over the matrix: job terms are weighted
+with BM25 (rarer skills and repeated mentions count for more, long
+descriptions are normalized), each job's weights are scaled to sum to 1,
+and a job's match percentage is the share of its weight covered by the
+candidate's skills.
+"""
+
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from skill_matcher import get_skill_matcher
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_MISSING_SKILLS = 10
+
+MIGRATION = """
+ALTER TABLE jobs ADD COLUMN description TEXT;
+CREATE TABLE job_vectors (
+    job_id TEXT PRIMARY KEY,
+    status TEXT,
+    terms TEXT,
+    taxonomy TEXT NOT NULL,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX idx_job_vectors_version ON job_vectors (version);
+"""
+
+
+def job_terms(job: Dict) -> Dict[str, int]:
+    """Canonical skill -> number of mentions in a job's position and description"""
+    text = "\n".join(filter(None, [job.get("position"), job.get("description")]))
+    return get_skill_matcher().count(text)
+
+
+def canonical_skills(skills: List[str]) -> List[str]:
+    """Map free-form skill names (e.g. from a parsed CV) onto the taxonomy"""
+    return get_skill_matcher().find("\n".join(skills))
+
+
+def _jobs_version(conn) -> int:
+    row = conn.execute(
+        "SELECT version FROM collection_versions WHERE name = 'jobs'"
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def record_job_vector(conn, job_id: str, job: Optional[Dict]):
+    """
+    Store a job's skill vector (or a tombstone when job is None). Must run
+    in the transaction that wrote the job, after its version bump.
+    """
+    conn.execute(
+        "INSERT OR REPLACE INTO job_vectors (job_id, status, terms, taxonomy, version) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (
+            job_id,
+            job["status"] if job else None,
+            json.dumps(job_terms(job)) if job else None,
+            get_skill_matcher().fingerprint,
+            _jobs_version(conn),
+        ),
+    )
+
+
+def backfill_job_vectors(conn) -> int:
+    """Vectorize jobs that have no vector or one from another taxonomy"""
+    rows = conn.execute(
+        "SELECT jobs.* FROM jobs LEFT JOIN job_vectors v ON v.job_id = jobs.id "
+        "WHERE v.job_id IS NULL OR v.taxonomy != ?",
+        (get_skill_matcher().fingerprint,),
+    ).fetchall()
+    if rows:
+        conn.execute(
+            "UPDATE collection_versions SET version = version + 1 WHERE name = 'jobs'"
+        )
+    for row in rows:
+        record_job_vector(conn, row["id"], dict(row))
+    return len(rows)
+
+
+class JobRanker:
+    """In-memory sparse job/skill matrix kept in step with job_vectors"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._version = -1
+        self._vectors: Dict[str, Dict[int, int]] = {}
+        self._statuses: Dict[str, str] = {}
+        self._vocabulary: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._matrix = None
+
+    async def rank(
+        self, skills: List[str], statuses: Optional[List[str]] = None, limit: int = 50
+    ) -> Dict:
+        """
+        Best-matching jobs for a set of canonical skills, with match
+        percentages and the job skills the candidate is missing
+        """
+        return await self.storage.run(self._rank, skills, statuses, limit)
+
+    def _refresh(self, conn):
+        """Apply the job vectors written since the last refresh"""
+        version = _jobs_version(conn)
+        if version == self._version:
+            return
+        for row in conn.execute(
+            "SELECT job_id, status, terms FROM job_vectors WHERE version > ?",
+            (self._version,),
+        ):
+            if row["terms"] is None:
+                self._vectors.pop(row["job_id"], None)
+                self._statuses.pop(row["job_id"], None)
+                continue
+            vector = {}
+            for term, count in json.loads(row["terms"]).items():
+                if term not in self._vocabulary:
+                    self._vocabulary[term] = len(self._terms)
+                    self._terms.append(term)
+                vector[self._vocabulary[term]] = count
+            self._vectors[row["job_id"]] = vector
+            self._statuses[row["job_id"]] = row["status"]
+        self._version = version
+        self._matrix = None
+
+    def _build(self):
+        """BM25-weighted CSR matrix with each row scaled to sum to 1"""
+        job_ids = [job_id for job_id, vector in self._vectors.items() if vector]
+        lengths = np.array([len(self._vectors[j]) for j in job_ids], dtype=np.int64)
+        indptr = np.zeros(len(job_ids) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter(
+            (t for j in job_ids for t in self._vectors[j]), dtype=np.int64, count=int(indptr[-1])
+        )
+        counts = np.fromiter(
+            (c for j in job_ids for c in self._vectors[j].values()),
+            dtype=np.float64, count=int(indptr[-1]),
+        )
+
+        n_jobs = len(job_ids)
+        weights = counts
+        if n_jobs:
+            df = np.bincount(indices, minlength=len(self._terms))
+            idf = np.log1p((n_jobs - df + 0.5) / (df + 0.5))
+            doc_length = np.add.reduceat(counts, indptr[:-1])
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_length / doc_length.mean())
+            tf = counts * (BM25_K1 + 1) / (counts + np.repeat(norm, lengths))
+            weights = idf[indices] * tf
+            totals = np.add.reduceat(weights, indptr[:-1])
+            weights = weights / np.repeat(np.where(totals > 0, totals, 1.0), lengths)
+        statuses = np.array([self._statuses[j] for j in job_ids], dtype=object)
+        self._matrix = (np.array(job_ids, dtype=object), statuses, indptr, indices, weights)
+
+    def _rank(self, conn, skills: List[str], statuses: Optional[List[str]], limit: int) -> Dict:
+        with self._lock:
+            self._refresh(conn)
+            if self._matrix is None:
+                self._build()
+            job_ids, job_statuses, indptr, indices, weights = self._matrix
+            terms = list(self._terms)
+            query = np.zeros(len(terms), dtype=np.float64)
+            for skill in skills:
+                if skill in self._vocabulary:
+                    query[self._vocabulary[skill]] = 1.0
+
+        if len(job_ids) == 0:
+            return {"total": 0, "results": []}
+        covered = query[indices] * weights
+        scores = np.add.reduceat(covered, indptr[:-1])
+        candidates = np.arange(len(job_ids))
+        if statuses:
+            candidates = candidates[np.isin(job_statuses, list(statuses))]
+        top = candidates[np.argsort(-scores[candidates], kind="stable")[:limit]]
+
+        results = []
+        for i in top:
+            start, end = indptr[i], indptr[i + 1]
+            row_terms, row_weights = indices[start:end], weights[start:end]
+            order = np.argsort(-row_weights, kind="stable")
+            results.append({
+                "job_id": job_ids[i],
+                "match": round(float(scores[i]) * 100, 1),
+                "matched_skills": [terms[t] for t in row_terms[order] if query[t]],
+                "missing_skills": [
+                    terms[t] for t in row_terms[order] if not query[t]
+                ][:MAX_MISSING_SKILLS],
+            })
+        return {"total": int(len(candidates)), "results": results}
@@ -1,28 +1,62 @@
-from datetime import datetime
+import asyncio
+import functools
+import json
+import os
+import zipfile
+from datetime import date, datetime, timezone
 from enum import Enum
-from typing import List, Optional
-
-try:
-    from cv_parser import CVParser
-    cv_parser = CVParser()
-    print("✅ Using advanced CV parser (pyresparser)")
-except ImportError as e:
-    print(f"⚠️ Advanced parser not available: {e}")
-    print("🔄 Using simple CV parser fallback")
-    from simple_cv_parser import SimpleCVParser
-    cv_parser = SimpleCVParser()
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from typing import Dict, List, Literal, Optional
+
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+import job_io
+from cv_cache import CVParseCache, make_key
+from cv_sessions import CVSessionStore, VersionConflict
+from job_ranking import JobRanker, canonical_skills
+from parse_engine import ParseEngine
+from parse_jobs import ParseJobQueue, QueueFull
+from response_cache import ResponseCache
+from serialization import project, select_fields
+from storage import Storage
+from telemetry import CV_CACHE, CV_PARSES, CV_REJECTED, log, render
+from timeseries import TimeseriesAnalytics, funnel_totals
+from uploads import (
+    BATCH_MAX_BYTES,
+    BATCH_MAX_FILES,
+    MAX_UPLOAD_BYTES,
+    MULTIPART_OVERHEAD,
+    SpooledUpload,
+    UploadSizeLimitMiddleware,
+    adopt_upload,
+    check_upload_format,
+    is_cv_filename,
+    list_zip_cvs,
+    read_zip_member,
+)
 
 app = FastAPI(title="Job Tracker API", version="1.0.0")
 
+# Refuse oversized CV uploads while they stream in, not after buffering them
+# (added before CORS so rejections still carry CORS headers)
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    limits={
+        "/api/cv/upload": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD,
+        "/api/cv/batch": BATCH_MAX_BYTES,
+        "/api/jobs/import": job_io.IMPORT_MAX_BYTES,
+    },
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Location", "Retry-After"],
 )
 
 
@@ -52,6 +86,7 @@ class Job(BaseModel):
     deadline: Optional[datetime] = None
     job_url: Optional[str] = None
     notes: Optional[str] = None
+    description: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
 
@@ -94,129 +129,721 @@ class CVParseResponse(BaseModel):
     projects: List[dict]
     ats_analysis: dict
     raw_data: dict
+    provenance: Dict[str, str] = {}
+    cv_id: Optional[str] = None
+
+
+class CVTextEdit(BaseModel):
+    start: int = Field(ge=0)
+    end: int = Field(ge=0)
+    text: str = ""
+
+
+class CVRescoreRequest(BaseModel):
+    edits: List[CVTextEdit] = Field(max_length=1000)
+    version: Optional[int] = None
+
+
+class CVRescoreResponse(CVParseResponse):
+    version: int
+    reextracted: List[str]
+
+
+# Jobs, contacts and profiles live in SQLite (see storage.py)
+storage = Storage()
+timeseries = TimeseriesAnalytics(storage)
+
+# Serialized read responses with ETags (see response_cache.py)
+response_cache = ResponseCache(storage)
+
+# Jobs scored against a candidate's skills (see job_ranking.py)
+job_ranker = JobRanker(storage)
+
+# CV parsing runs in a pool of worker processes (see parse_engine.py)
+parse_engine = ParseEngine()
+
+# Parsed CVs keyed by file content + parser version (see cv_cache.py)
+cv_cache = CVParseCache()
+
 
+# Parsed CVs kept for live editing and re-scoring (see cv_sessions.py)
+cv_sessions = CVSessionStore()
 
-# Mock data storage (replace with database)
-jobs_db = []
-contacts_db = []
-user_profiles_db = []
 
-# CV parser is initialized above
+def cv_response(parsed_data: Dict) -> CVParseResponse:
+    """Response for a single parsed CV, opening an editing session for it"""
+    text = parsed_data.get("document_text")
+    session = cv_sessions.open(text, parsed_data) if text else None
+    return CVParseResponse(**parsed_data, cv_id=session.id if session else None)
+
+
+async def parse_upload_response(upload: SpooledUpload) -> Dict:
+    return cv_response(await parse_upload(upload)).model_dump()
+
+
+# Uploads parsed in the background for ?async=true (see parse_jobs.py)
+parse_jobs = ParseJobQueue(
+    parse_upload_response,
+    workers=int(os.getenv("CV_PARSE_JOB_WORKERS", parse_engine.concurrency)),
+)
+
+
+@app.on_event("startup")
+async def open_storage():
+    storage.open()
+    # Runs after the server binds: a taxonomy change re-vectorizes every job
+    app.state.job_vector_backfill = asyncio.create_task(backfill_job_vectors())
+
+
+async def backfill_job_vectors():
+    try:
+        count = await storage.backfill_job_vectors()
+    except Exception as e:
+        log.error("❌ Job vector backfill failed: %s", e)
+        return
+    if count:
+        response_cache.invalidate("jobs")
+        log.info("🔁 Vectorized %d jobs for skill ranking", count)
+
+
+@app.on_event("shutdown")
+async def close_storage():
+    storage.close()
+
+
+@app.on_event("startup")
+async def start_parse_engine():
+    parse_engine.start()
+    # Load parser models in the background so the server binds immediately
+    parse_engine.start_warm_up()
+    parse_jobs.start()
+    cv_sessions.start()
+
+
+@app.on_event("shutdown")
+async def stop_parse_engine():
+    await parse_jobs.stop()
+    parse_engine.shutdown()
+    cv_cache.close()
 
 
 @app.get("/")
 async def root():
     return {"message": "Job Tracker API"}
 
+@app.get("/api/ready")
+async def readiness():
+    """
+    Readiness probe: 200 once every parser worker has loaded its models
+    """
+    status = {
+        "ready": parse_engine.ready,
+        "parser": parse_engine.warm_parser,
+        "advanced_parser": parse_engine.warm_parser == "CVParser",
+        "workers": parse_engine.concurrency,
+        "warm_workers": parse_engine.warm_workers,
+        "error": parse_engine.warm_up_error,
+    }
+    return JSONResponse(status, status_code=200 if parse_engine.ready else 503)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """CV handling latencies and counters in the Prometheus text format"""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/test")
 async def test_endpoint():
-    return {"status": "Backend is working", "cv_parser": type(cv_parser).__name__}
+    return {
+        "status": "Backend is working",
+        "cv_parser": await parse_engine.parser_name(),
+        "parser_workers": parse_engine.workers,
+    }
 
 
 @app.get("/api/jobs", response_model=List[Job])
-async def get_jobs(status: Optional[JobStatus] = None):
-    if status:
-        return [job for job in jobs_db if job.status == status]
-    return jobs_db
+async def get_jobs(
+    request: Request,
+    status: Optional[List[JobStatus]] = Query(None),
+    priority: Optional[List[Priority]] = Query(None),
+    location: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    deadline_after: Optional[datetime] = None,
+    deadline_before: Optional[datetime] = None,
+    sort: str = Query("created_at", pattern=r"^-?(created_at|deadline|priority)$"),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    List jobs one page at a time. Filters combine with AND; repeat status or
+    priority to match any of several values. Prefix sort with "-" for
+    descending order. The next page's cursor is returned in X-Next-Cursor.
+    fields=company,position,status returns only those fields (and id).
+    """
+    output_fields = select_fields(Job, fields)
+    filters = {
+        "status": status,
+        "priority": priority,
+        "location": location,
+        "created_after": created_after,
+        "created_before": created_before,
+        "deadline_after": deadline_after,
+        "deadline_before": deadline_before,
+    }
+
+    async def build(headers):
+        try:
+            jobs, next_cursor = await storage.list_jobs(
+                filters, sort.lstrip("-"), sort.startswith("-"), limit, after
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return jobs
+
+    return await response_cache.respond(request, ["jobs"], build, output_fields)
 
 
 @app.post("/api/jobs", response_model=Job)
 async def create_job(job: Job):
-    # TODO: Add to database
-    # TODO: Generate unique ID
-    # TODO: Set timestamps
-    return job
+    # ID and timestamps are generated by the storage layer
+    created = await storage.create_job(job.model_dump())
+    response_cache.invalidate("jobs")
+    return created
+
+
+@app.post("/api/jobs/import")
+async def import_jobs(
+    request: Request, format: Optional[str] = Query(None, pattern="^(csv|ndjson)$")
+):
+    """
+    Bulk-create jobs from a CSV (header row with Job field names) or NDJSON
+    request body. Rows duplicating an existing job are skipped; the report
+    lists skipped and invalid rows by row number.
+    """
+    fmt = format or job_io.format_from_content_type(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson",
+        )
+    if fmt == "csv":
+        records = job_io.iter_csv_records(request.stream())
+    else:
+        records = job_io.iter_ndjson_records(request.stream())
+    try:
+        return await job_io.import_jobs(storage, Job, records)
+    finally:
+        response_cache.invalidate("jobs")
+
+
+@app.get("/api/jobs/export")
+async def export_jobs(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    status: Optional[List[JobStatus]] = Query(None),
+):
+    """
+    Stream every job (optionally only some statuses) as CSV or NDJSON
+    """
+    return StreamingResponse(
+        job_io.export_jobs(storage, format, {"status": status}),
+        media_type=job_io.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="jobs.{format}"'},
+    )
+
+
+@app.get("/api/jobs/ranked")
+async def get_ranked_jobs(
+    profile_id: Optional[str] = None,
+    skills: Optional[List[str]] = Query(None),
+    status: Optional[List[JobStatus]] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    fields: Optional[str] = Query("id,company,position,status,priority,location,deadline"),
+):
+    """
+    Jobs ranked by how well their required skills (taken from position and
+    description) match a profile's skills, or an explicit skills list.
+    match is the percentage of a job's BM25-weighted skills the candidate
+    has; missing_skills lists the most important ones they lack.
+    """
+    if profile_id:
+        profile = await storage.get_profile(profile_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        skills = [*profile["skills"], *(skills or [])]
+    if not skills:
+        raise HTTPException(status_code=400, detail="Pass profile_id or skills")
+
+    output_fields = select_fields(Job, fields)
+    candidate_skills = canonical_skills(skills)
+    ranking = await job_ranker.rank(
+        candidate_skills, [s.value for s in status] if status else None, limit
+    )
+    jobs = await storage.get_jobs_by_id([r["job_id"] for r in ranking["results"]])
+    results = []
+    for result in ranking["results"]:
+        job = jobs.get(result.pop("job_id"))
+        if job is not None:
+            results.append({"job": project(job, output_fields), **result})
+    return {"skills": candidate_skills, "total": ranking["total"], "results": results}
 
 
 @app.get("/api/jobs/{job_id}", response_model=Job)
-async def get_job(job_id: str):
-    # TODO: Fetch from database
-    pass
+async def get_job(request: Request, job_id: str, fields: Optional[str] = None):
+    output_fields = select_fields(Job, fields)
+
+    async def build(headers):
+        job = await storage.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return job
+
+    return await response_cache.respond(request, ["jobs"], build, output_fields)
 
 
 @app.put("/api/jobs/{job_id}", response_model=Job)
 async def update_job(job_id: str, job: Job):
-    # TODO: Update in database
-    return job
+    updated = await storage.update_job(job_id, job.model_dump())
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    response_cache.invalidate("jobs")
+    return updated
 
 
 @app.delete("/api/jobs/{job_id}")
 async def delete_job(job_id: str):
-    # TODO: Delete from database
+    if not await storage.delete_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    response_cache.invalidate("jobs")
     return {"message": "Job deleted"}
 
 
+@app.get("/api/jobs/{job_id}/events")
+async def get_job_events(job_id: str):
+    """
+    Status transitions of a job, oldest first
+    """
+    events = await storage.list_job_events(job_id)
+    if not events:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return events
+
+
 @app.get("/api/contacts", response_model=List[Contact])
-async def get_contacts(job_id: Optional[str] = None):
-    if job_id:
-        return [contact for contact in contacts_db if contact.job_id == job_id]
-    return contacts_db
+async def get_contacts(
+    request: Request,
+    job_id: Optional[List[str]] = Query(None),
+    sort: str = Query("created_at", pattern=r"^-?created_at$"),
+    limit: int = Query(100, ge=1, le=500),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    """
+    List contacts one page at a time, optionally for one or more jobs. The
+    next page's cursor is returned in X-Next-Cursor. fields works as for
+    /api/jobs.
+    """
+    output_fields = select_fields(Contact, fields)
+
+    async def build(headers):
+        try:
+            contacts, next_cursor = await storage.list_contacts(
+                job_id, sort.startswith("-"), limit, after
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+        return contacts
+
+    return await response_cache.respond(request, ["contacts"], build, output_fields)
 
 
 @app.post("/api/contacts", response_model=Contact)
 async def create_contact(contact: Contact):
-    # TODO: Add to database
-    return contact
+    created = await storage.create_contact(contact.model_dump())
+    response_cache.invalidate("contacts")
+    return created
+
+
+@app.get("/api/search")
+async def search_documents(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[List[Literal["job", "contact"]]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Ranked full-text search over job company, position, location, notes and
+    description and contact name, role and notes. Every word is matched as
+    a prefix, so partial input works for search-as-you-type. Queries matching
+    more than 500 documents of a type rank the newest 500 of them plus the
+    newest 500 whose company/position (contact name/role) match.
+    """
+    return await storage.search(q, tuple(type or ("job", "contact")), limit)
 
 
 @app.get("/api/analytics", response_model=Analytics)
-async def get_analytics():
-    # TODO: Calculate analytics from database
-    return Analytics(
-        total_applications=0,
-        response_rate=0.0,
-        interviews_scheduled=0,
-        offers_received=0,
-        applications_this_week=0,
-        applications_this_month=0,
+async def get_analytics(request: Request):
+    """
+    Dashboard numbers, read from counters maintained on every job write.
+    Weeks start on Monday and months on the 1st (UTC); response_rate is the
+    percentage of applications that got an interview, offer or rejection.
+    """
+
+    async def build(headers):
+        return await storage.get_analytics()
+
+    # The week/month windows move with the date even when no job changes
+    today = datetime.now(timezone.utc).date().isoformat()
+    return await response_cache.respond(
+        request, ["jobs"], build, list(Analytics.model_fields), today
     )
 
 
+BUCKET_PATTERN = "^(day|week|month)$"
+
+
+@app.get("/api/analytics/timeseries/trends")
+async def get_application_trends(
+    bucket: str = Query("month", pattern=BUCKET_PATTERN),
+    periods: int = Query(6, ge=1, le=366),
+    end: Optional[date] = None,
+):
+    """
+    Applications, responses, interviews, offers and rejections per bucket,
+    each counted when it first happened for a job
+    """
+    return {"bucket": bucket, "series": await timeseries.series("trends", bucket, periods, end)}
+
+
+@app.get("/api/analytics/timeseries/funnel")
+async def get_conversion_funnel(
+    bucket: str = Query("month", pattern=BUCKET_PATTERN),
+    periods: int = Query(6, ge=1, le=366),
+    end: Optional[date] = None,
+):
+    """
+    Jobs grouped by when they were applied to, with how many of them have
+    since been answered, interviewed, offered or rejected
+    """
+    series = await timeseries.series("funnel", bucket, periods, end)
+    return {"bucket": bucket, "series": series, "total": funnel_totals(series)}
+
+
+@app.get("/api/analytics/timeseries/time-to-response")
+async def get_time_to_response(
+    bucket: str = Query("week", pattern=BUCKET_PATTERN),
+    periods: int = Query(6, ge=1, le=366),
+    end: Optional[date] = None,
+):
+    """
+    Days from application to first response (mean and percentiles), grouped
+    by when the application was made
+    """
+    return {
+        "bucket": bucket,
+        "series": await timeseries.series("time_to_response", bucket, periods, end),
+    }
+
+
 @app.post("/api/cv/upload", response_model=CVParseResponse)
-async def upload_and_parse_cv(file: UploadFile = File(...)):
+async def upload_and_parse_cv(
+    file: UploadFile = File(...),
+    run_async: bool = Query(False, alias="async"),
+):
     """
-    Upload CV and parse it to extract structured information
+    Upload CV and parse it to extract structured information. With
+    async=true, answer 202 with a parse job to poll instead of waiting
     """
-    print(f"📁 Received file: {file.filename}")
+    log.info("📁 Received file: %s", file.filename)
     
     # Validate file type
     if not file.filename or not file.filename.lower().endswith((".pdf", ".doc", ".docx")):
+        CV_REJECTED.inc(status="400")
         raise HTTPException(
             status_code=400, detail="Only PDF, DOC, and DOCX files are supported"
         )
 
-    # Validate file size (max 10MB)
-    file_content = await file.read()
-    print(f"📏 File size: {len(file_content)} bytes")
-    
-    if len(file_content) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File size must be less than 10MB")
+    # Starlette has already spooled the part; take its file over instead of
+    # copying it (413 above the 10MB cap)
+    upload = adopt_upload(file)
+    log.info("📏 File size: %d bytes", upload.size)
+
+    if run_async:
+        try:
+            job = parse_jobs.submit(upload)
+        except QueueFull as e:
+            upload.close()
+            raise HTTPException(
+                status_code=429,
+                detail="Too many CVs are waiting to be parsed; retry later",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        status_url = f"/api/cv/jobs/{job.id}"
+        return JSONResponse(
+            {
+                "job_id": job.id,
+                "status": job.status,
+                "status_url": status_url,
+                "events_url": f"{status_url}/events",
+            },
+            status_code=202,
+            headers={"Location": status_url},
+        )
 
-    temp_file_path = None
     try:
-        # Save uploaded file temporarily
-        print("💾 Saving file temporarily...")
-        temp_file_path = cv_parser.save_uploaded_file(file_content, file.filename)
-        print(f"✅ File saved to: {temp_file_path}")
-
-        # Parse the CV
-        print("🔍 Parsing CV...")
-        parsed_data = cv_parser.parse_cv(temp_file_path)
-        print(f"✅ CV parsed successfully")
-        print(f"📊 Parser result: {parsed_data}")
+        parsed_data = await parse_upload(upload)
+        log.debug("📊 Parser result: %s", parsed_data)
 
-        return CVParseResponse(**parsed_data)
+        return cv_response(parsed_data)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error processing CV: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error processing CV: %s", e)
         raise HTTPException(status_code=500, detail=f"Error processing CV: {str(e)}")
     finally:
-        # Clean up temporary file
-        if temp_file_path:
-            print(f"🗑️ Cleaning up: {temp_file_path}")
-            cv_parser.cleanup_file(temp_file_path)
+        upload.close()
+
+
+@app.post("/api/cv/contact")
+async def extract_cv_contact(file: UploadFile = File(...)):
+    """
+    Name, email and phone number of a CV, without parsing the rest. PDFs
+    are read from the first page only when it has the email and phone.
+    """
+    if not is_cv_filename(file.filename):
+        CV_REJECTED.inc(status="400")
+        raise HTTPException(
+            status_code=400, detail="Only PDF, DOC, and DOCX files are supported"
+        )
+    upload = adopt_upload(file)
+    try:
+        check_upload_format(upload)
+        return await parse_engine.extract_contact(upload.getvalue(), upload.filename)
+    finally:
+        upload.close()
+
+
+async def parse_upload(upload: SpooledUpload) -> Dict:
+    """Parse a spooled upload in the worker pool, going through the CV cache"""
+    # Fail fast on content that can't be parsed (e.g. legacy .doc without
+    # a converter) instead of spending a worker on it
+    check_upload_format(upload)
+    cache_key = make_key(upload.digest, await parse_engine.parser_id())
+    parsed_data = await cv_cache.get_async(cache_key)
+    if parsed_data is not None:
+        CV_CACHE.inc(result="hit")
+        log.info("⚡ Returning cached parse result")
+        return parsed_data
+    CV_CACHE.inc(result="miss")
+
+    # Parse the CV in a worker process so the event loop stays free
+    log.info("🔍 Parsing CV...")
+    try:
+        if upload.path:
+            parsed_data = await parse_engine.parse_file(upload.path)
+        else:
+            parsed_data = await parse_engine.parse(upload.getvalue(), upload.filename)
+    except Exception:
+        CV_PARSES.inc(parser=parse_engine.warm_parser or "unknown", result="exception")
+        raise
+    log.info("✅ CV parsed successfully")
+    # Engines that failed for this upload (e.g. the advanced one timed out)
+    # may succeed on a retry, so a degraded result is not cached
+    degraded = parsed_data.pop("engine_failures", None)
+    if degraded:
+        log.info("⚠️ Not caching a degraded parse result: %s", degraded)
+    elif "error" not in parsed_data.get("raw_data", {}):
+        await cv_cache.put_async(cache_key, parsed_data)
+    return parsed_data
+
+
+@app.get("/api/cv/jobs/{job_id}")
+async def get_parse_job(job_id: str):
+    """Status of an async parse job, with the result once it is done"""
+    job = parse_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Parse job not found")
+    return job.to_dict()
+
+
+@app.get("/api/cv/jobs/{job_id}/events")
+async def stream_parse_job(job_id: str):
+    """Server-Sent Events: one event per status change of a parse job"""
+    job = parse_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Parse job not found")
+    return StreamingResponse(
+        parse_jobs.events(job),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/cv/batch")
+async def upload_and_parse_cv_batch(files: List[UploadFile] = File(...)):
+    """
+    Parse many CVs (or zips of CVs) concurrently, streaming one NDJSON line
+    per CV as soon as it is done
+    """
+    uploads = []
+    archives = []
+    items = []
+
+    async def spooled(upload):
+        return upload
+
+    async def rejected(status_code, detail):
+        raise HTTPException(status_code=status_code, detail=detail)
+
+    try:
+        for file in files:
+            if file.filename and file.filename.lower().endswith(".zip"):
+                # Read the zip where Starlette spooled it; members are
+                # decompressed lazily
+                upload = adopt_upload(file, BATCH_MAX_BYTES)
+                uploads.append(upload)
+                try:
+                    archive = zipfile.ZipFile(upload.reader())
+                except zipfile.BadZipFile:
+                    raise HTTPException(
+                        status_code=400, detail=f"{file.filename} is not a valid zip file"
+                    )
+                archives.append(archive)
+                for info in list_zip_cvs(archive):
+                    load = functools.partial(
+                        asyncio.to_thread, read_zip_member, archive, info
+                    )
+                    items.append((info.filename, load))
+            elif is_cv_filename(file.filename):
+                # Take the files over now: UploadFiles may be closed once
+                # the streaming response has been returned
+                try:
+                    upload = adopt_upload(file)
+                except HTTPException as e:
+                    load = functools.partial(rejected, e.status_code, e.detail)
+                else:
+                    uploads.append(upload)
+                    load = functools.partial(spooled, upload)
+                items.append((file.filename, load))
+            else:
+                CV_REJECTED.inc(status="400")
+                load = functools.partial(
+                    rejected, 400, "Only PDF, DOC, and DOCX files are supported"
+                )
+                items.append((file.filename, load))
+
+            if len(items) > BATCH_MAX_FILES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"A batch can contain at most {BATCH_MAX_FILES} CVs",
+                )
+    except BaseException:
+        for archive in archives:
+            archive.close()
+        for upload in uploads:
+            upload.close()
+        raise
+
+    return StreamingResponse(
+        stream_batch_results(items, uploads, archives),
+        media_type="application/x-ndjson",
+    )
+
+
+async def stream_batch_results(items, uploads, archives):
+    """Run batch items with bounded concurrency and yield NDJSON lines"""
+    concurrency = int(os.getenv("CV_BATCH_CONCURRENCY", parse_engine.concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(index: int, filename: str, load) -> Dict:
+        line = {"index": index, "filename": filename}
+        async with semaphore:
+            upload = None
+            try:
+                upload = await load()
+                parsed_data = await parse_upload(upload)
+                line.update(
+                    status="ok", result=CVParseResponse(**parsed_data).model_dump()
+                )
+            except HTTPException as e:
+                line.update(status="error", error=e.detail)
+            except Exception as e:
+                line.update(status="error", error=f"Error processing CV: {str(e)}")
+            finally:
+                if upload is not None:
+                    upload.close()
+        return line
+
+    tasks = [
+        asyncio.create_task(run(index, filename, load))
+        for index, (filename, load) in enumerate(items)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            yield (json.dumps(line, default=str) + "\n").encode()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for archive in archives:
+            archive.close()
+        for upload in uploads:
+            upload.close()
+
+
+@app.get("/api/cv/cache")
+async def get_cv_cache_stats():
+    """
+    Hit/miss counters for the parsed CV cache
+    """
+    return await asyncio.to_thread(cv_cache.stats)
+
+
+@app.get("/api/cv/{cv_id}")
+async def get_cv_document(cv_id: str):
+    """
+    A parsed CV's editing session: its text, section offsets and fields
+    """
+    session = cv_sessions.get(cv_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="CV not found or expired")
+    return session.to_dict()
+
+
+@app.post("/api/cv/{cv_id}/rescore", response_model=CVRescoreResponse)
+async def rescore_cv(cv_id: str, request: CVRescoreRequest):
+    """
+    Apply text edits to a parsed CV, re-extract only the sections they
+    touched and recompute the ATS analysis
+    """
+    session = cv_sessions.get(cv_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="CV not found or expired")
+    edits = [(edit.start, edit.end, edit.text) for edit in request.edits]
+    try:
+        reextracted = await cv_sessions.rescore(session, edits, request.version)
+    except VersionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return CVRescoreResponse(
+        **session.result, cv_id=session.id, version=session.version, reextracted=reextracted
+    )
+
+
+@app.get("/api/cache")
+async def get_response_cache_stats():
+    """
+    Hit/miss/304 counters for the read response cache
+    """
+    return response_cache.stats()
 
 
 @app.post("/api/profile", response_model=UserProfile)
@@ -224,23 +851,26 @@ async def create_user_profile(profile: UserProfile):
     """
     Create user profile from parsed CV data
     """
-    # TODO: Save to database
-    # TODO: Generate unique ID
-    # TODO: Set timestamps
-    user_profiles_db.append(profile)
-    return profile
+    created = await storage.create_profile(profile.model_dump())
+    response_cache.invalidate("user_profiles")
+    return created
 
 
 @app.get("/api/profile/{user_id}", response_model=UserProfile)
-async def get_user_profile(user_id: str):
+async def get_user_profile(request: Request, user_id: str):
     """
     Get user profile by ID
     """
-    # TODO: Fetch from database
-    for profile in user_profiles_db:
-        if profile.id == user_id:
-            return profile
-    raise HTTPException(status_code=404, detail="Profile not found")
+
+    async def build(headers):
+        profile = await storage.get_profile(user_id)
+        if profile is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return profile
+
+    return await response_cache.respond(
+        request, ["user_profiles"], build, list(UserProfile.model_fields)
+    )
 
 
 @app.put("/api/profile/{user_id}", response_model=UserProfile)
@@ -248,8 +878,11 @@ async def update_user_profile(user_id: str, profile: UserProfile):
     """
     Update user profile
     """
-    # TODO: Update in database
-    return profile
+    updated = await storage.update_profile(user_id, profile.model_dump())
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    response_cache.invalidate("user_profiles")
+    return updated
 
 
 if __name__ == "__main__":
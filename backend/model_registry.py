@@ -0,0 +1,155 @@
+"""
+Process-wide registry of NLP models used by the CV parsers.
+
+pyresparser calls spacy.load() for two pipelines and re-reads its skills CSV
+for every resume it parses. The registry loads each model once per process
+and patches pyresparser to take the warm instances from here, so the
+per-request model-load cost drops to zero. It can also hand pyresparser
+text that was already extracted, so a CV is only read once.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# Vendored NLTK data (populated by setup.py); nothing is downloaded at runtime
+NLTK_DATA_DIR = os.getenv("CV_NLTK_DATA", str(Path(__file__).parent / "nltk_data"))
+NLTK_PACKAGES = {
+    "punkt": "tokenizers/punkt",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+    "maxent_ne_chunker": "chunkers/maxent_ne_chunker",
+    "words": "corpora/words",
+    "stopwords": "corpora/stopwords",
+}
+
+# A package name or a path to a vendored model directory
+SPACY_MODEL = os.getenv("CV_SPACY_MODEL", "en_core_web_sm")
+
+# Pipeline components pyresparser never uses can be skipped, e.g.
+# CV_SPACY_DISABLE=lemmatizer. Applies to the main English pipeline only.
+SPACY_DISABLE = tuple(
+    name.strip() for name in os.getenv("CV_SPACY_DISABLE", "").split(",") if name.strip()
+)
+
+_models: Dict[Tuple[str, Tuple[str, ...]], object] = {}
+_lock = threading.Lock()
+
+# (text, page count) of the document pyresparser is parsing on this thread
+_shared = threading.local()
+
+
+def configure_nltk_data() -> List[str]:
+    """Point NLTK at the vendored data directory and return missing packages"""
+    import nltk
+
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    missing = []
+    for package, resource in NLTK_PACKAGES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            missing.append(package)
+    return missing
+
+
+def get_spacy_model(name: str = SPACY_MODEL, disable: Tuple[str, ...] = ()):
+    """Load a spaCy pipeline once per process and return the shared instance"""
+    if not disable and name == SPACY_MODEL:
+        disable = SPACY_DISABLE
+    key = (name, tuple(disable))
+    model = _models.get(key)
+    if model is None:
+        with _lock:
+            model = _models.get(key)
+            if model is None:
+                import spacy
+
+                model = spacy.load(name, disable=list(disable))
+                _models[key] = model
+    return model
+
+
+class _RegistrySpacy:
+    """Stand-in for the spacy module inside pyresparser: load() hits the registry"""
+
+    def __init__(self, spacy_module):
+        self._spacy = spacy_module
+
+    def load(self, name, **kwargs):
+        name = str(name)
+        if name == "en_core_web_sm":
+            # pyresparser hard-codes the package name; honour CV_SPACY_MODEL
+            name = SPACY_MODEL
+        return get_spacy_model(name, tuple(kwargs.get("disable", ())))
+
+    def __getattr__(self, attr):
+        return getattr(self._spacy, attr)
+
+
+class _CachedPandas:
+    """Stand-in for pandas inside pyresparser.utils: read_csv() is memoized"""
+
+    def __init__(self, pandas_module):
+        self._pandas = pandas_module
+
+    @lru_cache(maxsize=8)
+    def read_csv(self, path, *args, **kwargs):
+        # pyresparser only reads column names from its skills file
+        return self._pandas.read_csv(path, *args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._pandas, attr)
+
+
+class _SharedText:
+    """
+    Stand-in for pyresparser's extract_text/get_number_of_pages: inside
+    shared_document() they return what was already extracted
+    """
+
+    def __init__(self, function, index: int):
+        self._function = function
+        self._index = index
+
+    def __call__(self, *args, **kwargs):
+        document = getattr(_shared, "document", None)
+        if document is None:
+            return self._function(*args, **kwargs)
+        return document[self._index]
+
+
+@contextmanager
+def shared_document(text: str, page_count=None):
+    """Have pyresparser parse already extracted text instead of the file"""
+    previous = getattr(_shared, "document", None)
+    _shared.document = (text, page_count)
+    try:
+        yield
+    finally:
+        _shared.document = previous
+
+
+def install_pyresparser_hooks():
+    """Make pyresparser reuse registry models instead of reloading them per CV"""
+    from pyresparser import resume_parser, utils
+
+    if not isinstance(resume_parser.spacy, _RegistrySpacy):
+        resume_parser.spacy = _RegistrySpacy(resume_parser.spacy)
+    if hasattr(utils, "pd") and not isinstance(utils.pd, _CachedPandas):
+        utils.pd = _CachedPandas(utils.pd)
+    if not isinstance(utils.extract_text, _SharedText):
+        utils.extract_text = _SharedText(utils.extract_text, 0)
+        utils.get_number_of_pages = _SharedText(utils.get_number_of_pages, 1)
+
+
+def warm_pyresparser_models():
+    """Load the pipelines pyresparser needs so the first CV is not slow"""
+    from pyresparser import resume_parser
+
+    get_spacy_model(SPACY_MODEL)
+    # pyresparser ships its custom NER model in its package directory
+    get_spacy_model(os.path.dirname(os.path.abspath(resume_parser.__file__)))
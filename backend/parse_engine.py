@@ -0,0 +1,243 @@
+"""
+Process-pool CV parsing engine.
+
+pdfplumber, pyresparser and spaCy are CPU bound, so parsing runs in worker
+processes. Each worker builds its parser once in the pool initializer and
+the API awaits the result without blocking the event loop.
+"""
+
+import asyncio
+import importlib.util
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from telemetry import CV_PARSES, capture, log, replay, span
+
+PARSER_ENGINES = ("auto", "advanced", "simple")
+
+# Parser instance owned by the current worker process
+_worker_parser = None
+
+
+def load_parser(engine: str = "auto"):
+    """Build the CV parser for the requested engine"""
+    if engine not in PARSER_ENGINES:
+        raise ValueError(f"Unknown CV parser engine: {engine}")
+
+    if engine in ("auto", "advanced"):
+        try:
+            # Cheap availability check; the heavy stack is only imported
+            # here, inside the worker
+            for module in ("pyresparser", "spacy", "nltk"):
+                if importlib.util.find_spec(module) is None:
+                    raise ImportError(f"No module named '{module}'")
+            from cv_parser import CVParser
+
+            return CVParser()
+        except ImportError as e:
+            if engine == "advanced":
+                raise
+            log.warning("⚠️ Advanced parser not available: %s", e)
+            log.info("🔄 Using simple CV parser fallback")
+
+    from simple_cv_parser import SimpleCVParser
+
+    return SimpleCVParser()
+
+
+def _init_worker(engine: str):
+    """Pool initializer: load the parser once per worker process"""
+    global _worker_parser
+    _worker_parser = load_parser(engine)
+
+
+def _instrumented(parse, *args):
+    """
+    Run a parse, returning its result together with the metric updates it
+    made, which the API process replays into its own registry
+    """
+    with capture() as updates:
+        with span("parse"):
+            result = parse(*args)
+        outcome = "error" if "error" in result.get("raw_data", {}) else "ok"
+        CV_PARSES.inc(parser=type(_worker_parser).__name__, result=outcome)
+    return result, updates
+
+
+def _parse_in_worker(file_content: bytes, filename: str):
+    """Parse one uploaded CV with the worker's preloaded parser"""
+    return _instrumented(_worker_parser.parse_cv_bytes, file_content, filename)
+
+
+def _parse_file_in_worker(file_path: str):
+    """Parse a CV that was spooled to disk"""
+    return _instrumented(_worker_parser.parse_cv, file_path)
+
+
+def _contact_in_worker(file_content: bytes, filename: str):
+    """Contact details of one uploaded CV, reading as few pages as it can"""
+    with capture() as updates:
+        with span("extract_contact_info"):
+            info = _worker_parser.extract_contact_info(io.BytesIO(file_content), filename)
+    return info, updates
+
+
+def _worker_parser_name() -> str:
+    return type(_worker_parser).__name__
+
+
+def _worker_parser_id() -> str:
+    from skill_matcher import get_skill_matcher
+
+    parser = _worker_parser
+    version = getattr(parser, "VERSION", "0")
+    return f"{type(parser).__name__}/{version}/{get_skill_matcher().fingerprint}"
+
+
+class ParseEngine:
+    """Dispatch CV parsing to a pool of preloaded parser workers"""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        engine: Optional[str] = None,
+        start_method: Optional[str] = None,
+    ):
+        if workers is None:
+            workers = int(os.getenv("CV_PARSER_WORKERS", os.cpu_count() or 1))
+        self.workers = max(workers, 0)
+        self.engine = engine or os.getenv("CV_PARSER_ENGINE", "auto")
+        self.start_method = start_method or os.getenv(
+            "CV_PARSER_START_METHOD", "spawn"
+        )
+        if self.engine not in PARSER_ENGINES:
+            raise ValueError(f"Unknown CV parser engine: {self.engine}")
+        self._executor = None
+        self._parser_id = None
+        self.warm_workers = 0
+        self.warm_parser: Optional[str] = None
+        self.warm_up_error: Optional[str] = None
+        self._warm_up_done = False
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self._warm_up_again = False
+
+    @property
+    def concurrency(self) -> int:
+        """Number of CVs that can be parsed at the same time"""
+        return max(self.workers, 1)
+
+    def start(self):
+        """Create the worker pool (workers=0 parses in a background thread)"""
+        if self._executor is not None:
+            return
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self.engine,),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="cv-parser",
+                initializer=_init_worker,
+                initargs=(self.engine,),
+            )
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.warm_workers = 0
+        self._warm_up_done = False
+
+    @property
+    def ready(self) -> bool:
+        """Whether every worker has finished loading its parser"""
+        return self._warm_up_done and self.warm_up_error is None
+
+    def start_warm_up(self) -> asyncio.Task:
+        """Run warm_up() in the background; once more after it if it is running"""
+        if self._warm_up_task is None or self._warm_up_task.done():
+            self._warm_up_task = asyncio.create_task(self.warm_up())
+        else:
+            self._warm_up_again = True
+        return self._warm_up_task
+
+    async def warm_up(self):
+        """
+        Load the parser in every worker. Run this as a background task after
+        startup so the server can bind and serve while models load.
+        """
+        self.warm_up_error = None
+        try:
+            # Workers are spawned on demand; one task per worker brings
+            # them all up and waits for each initializer to finish
+            names = await asyncio.gather(
+                *(self._submit(_worker_parser_name) for _ in range(self.concurrency))
+            )
+            self.warm_workers = len(names)
+            self.warm_parser = names[0]
+        except Exception as e:
+            self.warm_up_error = str(e)
+            log.error("❌ CV parser warm-up failed: %s", e)
+        finally:
+            self._warm_up_done = True
+            if self._warm_up_again:
+                # The pool was replaced while this ran (see _submit)
+                self._warm_up_again = False
+                self._warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def _submit(self, fn, *args):
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            if self._executor is executor:
+                # A worker died (e.g. crashed inside a native PDF library);
+                # replace the pool so later uploads are not all rejected.
+                # Readiness is kept: the new workers load the parser again
+                # in the background, unless loading it is what crashed.
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self.start()
+                if asyncio.current_task() is not self._warm_up_task:
+                    self.start_warm_up()
+            raise
+
+    async def parse(self, file_content: bytes, filename: str) -> Dict:
+        """Parse an uploaded CV in a worker and return the parsed data"""
+        result, updates = await self._submit(_parse_in_worker, file_content, filename)
+        replay(updates)
+        return result
+
+    async def parse_file(self, file_path: str) -> Dict:
+        """Parse a CV file on local disk in a worker"""
+        result, updates = await self._submit(_parse_file_in_worker, file_path)
+        replay(updates)
+        return result
+
+    async def extract_contact(self, file_content: bytes, filename: str) -> Dict:
+        """Name, email and phone number of an uploaded CV, from a worker"""
+        info, updates = await self._submit(_contact_in_worker, file_content, filename)
+        replay(updates)
+        return info
+
+    async def parser_name(self) -> str:
+        """Name of the parser class the workers are using"""
+        return await self._submit(_worker_parser_name)
+
+    async def parser_id(self) -> str:
+        """Parser name and version, used to key cached parse results"""
+        if self._parser_id is None:
+            self._parser_id = await self._submit(_worker_parser_id)
+        return self._parser_id
@@ -0,0 +1,203 @@
+"""
+Asynchronous CV parse jobs.
+
+POST /api/cv/upload?async=true answers 202 with a job id as soon as the
+upload has been read. The upload goes into a bounded in-process queue
+drained by a fixed number of worker tasks, which parse it the same way as
+a synchronous upload (CV cache, then the parser pool). Clients poll
+GET /api/cv/jobs/{id} or follow GET /api/cv/jobs/{id}/events, a
+Server-Sent Events stream of status changes ending with the result.
+
+When the queue is full new jobs are refused with 429 and a Retry-After
+estimated from recent parse times, so bursts are shed instead of piling up
+work that clients will have given up on. Finished jobs are kept for
+CV_PARSE_JOB_TTL seconds.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from telemetry import CV_REJECTED, STAGE_SECONDS, log
+
+QUEUE_SIZE = int(os.getenv("CV_PARSE_QUEUE_SIZE", "32"))
+JOB_TTL = float(os.getenv("CV_PARSE_JOB_TTL", "600"))
+MAX_FINISHED_JOBS = 1000
+KEEPALIVE_SECONDS = 15.0
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("CV parse queue is full")
+        self.retry_after = retry_after
+
+
+class ParseJob:
+    def __init__(self, upload):
+        self.id = uuid.uuid4().hex
+        self.upload = upload
+        self.filename = upload.filename
+        self.status = QUEUED
+        self.position = 0
+        self.result: Optional[Dict] = None
+        self.error: Optional[Dict] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+    def notify(self):
+        """Wake everyone waiting for a change of this job"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def to_dict(self) -> Dict:
+        data = {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status == QUEUED:
+            data["position"] = self.position
+        if self.status == DONE:
+            data["result"] = self.result
+        if self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+class ParseJobQueue:
+    """Bounded FIFO of parse jobs drained by a fixed number of workers"""
+
+    def __init__(
+        self,
+        parse: Callable[[object], Awaitable[Dict]],
+        workers: int,
+        max_queued: int = QUEUE_SIZE,
+    ):
+        self.parse = parse
+        self.workers = max(workers, 1)
+        self.max_queued = max_queued
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._jobs: "OrderedDict[str, ParseJob]" = OrderedDict()
+        self._waiting: "deque[ParseJob]" = deque()
+        self._recent_seconds: "deque[float]" = deque(maxlen=50)
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for job in self._waiting:
+            job.upload.close()
+        self._waiting.clear()
+
+    def retry_after(self) -> int:
+        """Seconds until a queue slot is likely to be free"""
+        average = sum(self._recent_seconds) / len(self._recent_seconds) if self._recent_seconds else 1.0
+        return max(1, round(average * len(self._waiting) / self.workers))
+
+    def submit(self, upload) -> ParseJob:
+        """Queue an upload (which the job then owns); QueueFull when at capacity"""
+        self._expire()
+        job = ParseJob(upload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            CV_REJECTED.inc(status="429")
+            raise QueueFull(self.retry_after())
+        job.position = len(self._waiting)
+        self._waiting.append(job)
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[ParseJob]:
+        return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": len(self._waiting),
+            "max_queued": self.max_queued,
+            "workers": self.workers,
+            "jobs": len(self._jobs),
+        }
+
+    async def events(self, job: ParseJob) -> AsyncIterator[bytes]:
+        """SSE stream of the job's state, one event per change, until it finishes"""
+        while True:
+            changed = job._changed
+            yield f"event: {job.status}\ndata: {json.dumps(job.to_dict(), default=str)}\n\n".encode()
+            if job.finished:
+                return
+            # Comment lines keep proxies from closing an idle stream
+            while not changed.is_set():
+                try:
+                    await asyncio.wait_for(changed.wait(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ParseJob):
+        self._waiting.remove(job)
+        for position, waiting in enumerate(self._waiting):
+            waiting.position = position
+            waiting.notify()
+        job.status = RUNNING
+        job.started_at = time.time()
+        STAGE_SECONDS.observe(job.started_at - job.created_at, stage="queue_wait")
+        job.notify()
+        try:
+            job.result = await self.parse(job.upload)
+            job.status = DONE
+        except HTTPException as e:
+            job.error = {"status_code": e.status_code, "detail": e.detail}
+            job.status = FAILED
+        except Exception as e:
+            log.exception("❌ Error processing CV: %s", e)
+            job.error = {"status_code": 500, "detail": f"Error processing CV: {str(e)}"}
+            job.status = FAILED
+        finally:
+            job.upload.close()
+            job.upload = None
+            job.finished_at = time.time()
+            self._recent_seconds.append(job.finished_at - job.started_at)
+            job.notify()
+
+    def _expire(self):
+        """Forget finished jobs past their TTL (and the oldest beyond the cap)"""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for job in finished:
+            if excess > 0 or now - job.finished_at > JOB_TTL:
+                del self._jobs[job.id]
+                excess -= 1
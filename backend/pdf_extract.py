@@ -0,0 +1,269 @@
+"""
+Pluggable PDF text extraction.
+
+Backends, fastest first:
+
+- ``pdfium``: pypdfium2's text layer (native code, no layout analysis)
+- ``pdfminer``: pdfminer.six driven directly, with layout parameters tuned
+  for CVs (no hierarchical box grouping, which is the slow part)
+- ``pdfplumber``: the original extractor
+
+``auto`` uses the first one that is installed and falls back to the next
+when a backend fails on a document. pdfplumber pulls in pdfminer.six and
+pypdfium2, so all three are normally available.
+
+Every document is read up to a page cap and within a time budget, which
+interrupts the page being read when it runs out (SIGALRM on the main
+thread, as in the parser and page workers); pages read before then are
+kept and the result is marked as truncated. Documents with at least
+PARALLEL_MIN_PAGES pages are split across a small pool of page worker
+processes, started on first use. The text is joined the way the original extractor
+did (each non-empty page followed by a newline), so output stays
+compatible with the existing parsers and cache.
+"""
+
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from cv_pipeline import EngineTimeout, call_with_timeout
+from telemetry import log
+
+PDF_BACKENDS = ("auto", "pdfium", "pdfminer", "pdfplumber")
+
+DEFAULT_BACKEND = os.getenv("CV_PDF_BACKEND", "auto")
+MAX_PAGES = int(os.getenv("CV_PDF_MAX_PAGES", "30"))
+TIME_BUDGET = float(os.getenv("CV_PDF_TIME_BUDGET", "15"))
+PAGE_WORKERS = int(os.getenv("CV_PDF_PAGE_WORKERS", "2"))
+PARALLEL_MIN_PAGES = int(os.getenv("CV_PDF_PARALLEL_MIN_PAGES", "8"))
+
+# Page worker pool, created on first use in the process that needs it
+_page_pool: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class PdfText:
+    pages: List[str] = field(default_factory=list)
+    page_count: int = 0
+    backend: str = ""
+    truncated: bool = False
+
+    @property
+    def text(self) -> str:
+        return "".join(page + "\n" for page in self.pages if page)
+
+
+def _pdfium_page_count(data: bytes) -> int:
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(data)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def _pdfium_pages(data: bytes, first: int, last: int, pages: List[str]):
+    import pypdfium2 as pdfium
+
+    pdf = pdfium.PdfDocument(data)
+    try:
+        for index in range(first, min(last, len(pdf))):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            pages.append(text.replace("\r\n", "\n").replace("\r", "\n").strip("\n"))
+    finally:
+        pdf.close()
+
+
+# Line grouping as pdfminer's defaults, but boxes_flow=None skips the
+# quadratic grouping of text boxes and reads them top to bottom instead
+_LAPARAMS = dict(line_overlap=0.5, char_margin=2.0, line_margin=0.5, word_margin=0.1, boxes_flow=None)
+
+
+def _pdfminer_page_count(data: bytes) -> int:
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    document = PDFDocument(PDFParser(io.BytesIO(data)))
+    return sum(1 for _ in PDFPage.create_pages(document))
+
+
+def _pdfminer_pages(data: bytes, first: int, last: int, pages: List[str]):
+    from pdfminer.converter import PDFPageAggregator
+    from pdfminer.layout import LAParams, LTTextContainer
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    document = PDFDocument(PDFParser(io.BytesIO(data)))
+    resources = PDFResourceManager(caching=True)
+    device = PDFPageAggregator(resources, laparams=LAParams(**_LAPARAMS))
+    interpreter = PDFPageInterpreter(resources, device)
+    for index, page in enumerate(PDFPage.create_pages(document)):
+        if index < first:
+            continue
+        if index >= last:
+            break
+        interpreter.process_page(page)
+        boxes = [item for item in device.get_result() if isinstance(item, LTTextContainer)]
+        # Top of the page first; PDF y coordinates grow upwards
+        boxes.sort(key=lambda box: (-round(box.y1), box.x0))
+        pages.append("".join(box.get_text() for box in boxes).strip("\n"))
+
+
+def _pdfplumber_page_count(data: bytes) -> int:
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return len(pdf.pages)
+
+
+def _pdfplumber_pages(data: bytes, first: int, last: int, pages: List[str]):
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        for page in pdf.pages[first:last]:
+            pages.append(page.extract_text() or "")
+
+
+_BACKENDS: Dict[str, Tuple[str, Callable, Callable]] = {
+    # name -> (module that must be importable, page count, page range);
+    # page range(data, first, last, pages) appends each page's text to pages
+    "pdfium": ("pypdfium2", _pdfium_page_count, _pdfium_pages),
+    "pdfminer": ("pdfminer", _pdfminer_page_count, _pdfminer_pages),
+    "pdfplumber": ("pdfplumber", _pdfplumber_page_count, _pdfplumber_pages),
+}
+
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first"""
+    import importlib.util
+
+    return [
+        name for name, (module, _, _) in _BACKENDS.items()
+        if importlib.util.find_spec(module) is not None
+    ]
+
+
+def import_backends() -> List[str]:
+    """Import the installed backends up front; returns their names"""
+    import importlib
+
+    names = available_backends()
+    for name in names:
+        importlib.import_module(_BACKENDS[name][0])
+    return names
+
+
+def _read(source: Union[str, bytes, BinaryIO]) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    source.seek(0)
+    return source.read()
+
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    global _page_pool
+    if _page_pool is None:
+        # Spawned: the process asking may be the threaded API process
+        _page_pool = ProcessPoolExecutor(
+            max_workers=PAGE_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _page_pool
+
+
+def _pages_until(backend: str, data: bytes, first: int, last: int, deadline: float) -> List[str]:
+    """Text of pages first..last-1, cut short (mid-page if need be) at the deadline"""
+    _, _, page_range = _BACKENDS[backend]
+    pages: List[str] = []
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return pages
+    try:
+        call_with_timeout(page_range, remaining, data, first, last, pages)
+    except EngineTimeout:
+        # Off the main thread the reader is abandoned, not stopped
+        return list(pages)
+    return pages
+
+
+def _extract_parallel(
+    backend: str, data: bytes, pages: int, deadline: float
+) -> Tuple[List[str], bool]:
+    """Split the page range over the page worker processes"""
+    chunk = -(-pages // PAGE_WORKERS)
+    ranges = [(first, min(first + chunk, pages)) for first in range(0, pages, chunk)]
+    futures = [
+        _get_page_pool().submit(_pages_until, backend, data, first, last, deadline)
+        for first, last in ranges
+    ]
+    # Each chunk stops by itself at the deadline
+    texts, truncated = [], False
+    for (first, last), future in zip(ranges, futures):
+        chunk_texts = future.result()
+        truncated = truncated or len(chunk_texts) < last - first
+        texts.extend(chunk_texts)
+    return texts, truncated
+
+
+def _extract_with(
+    backend: str, data: bytes, max_pages: int, deadline: float
+) -> PdfText:
+    _, page_count, _ = _BACKENDS[backend]
+    total = page_count(data)
+    pages = min(total, max_pages)
+    if PAGE_WORKERS > 1 and pages >= PARALLEL_MIN_PAGES:
+        texts, truncated = _extract_parallel(backend, data, pages, deadline)
+    else:
+        texts = _pages_until(backend, data, 0, pages, deadline)
+        truncated = len(texts) < pages
+    return PdfText(
+        pages=texts,
+        page_count=total,
+        backend=backend,
+        truncated=truncated or total > pages,
+    )
+
+
+def extract_pdf(
+    source: Union[str, bytes, BinaryIO],
+    max_pages: Optional[int] = None,
+    time_budget: Optional[float] = None,
+    backend: Optional[str] = None,
+) -> PdfText:
+    """
+    Text of a PDF (path, bytes or file object), page by page, reading at
+    most max_pages pages for at most time_budget seconds
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in PDF_BACKENDS:
+        raise ValueError(f"Unknown PDF backend: {backend}")
+    candidates = available_backends() if backend == "auto" else [backend]
+    if not candidates:
+        raise ImportError("No PDF backend installed (pypdfium2, pdfminer.six or pdfplumber)")
+
+    data = _read(source)
+    deadline = time.monotonic() + (TIME_BUDGET if time_budget is None else time_budget)
+    max_pages = MAX_PAGES if max_pages is None else max_pages
+    error = None
+    for name in candidates:
+        try:
+            return _extract_with(name, data, max_pages, deadline)
+        except Exception as e:
+            error = e
+            if len(candidates) > 1:
+                log.warning("⚠️ PDF backend %s failed: %s", name, e)
+    raise error
@@ -0,0 +1,132 @@
+"""
+Conditional GETs and an in-process cache of serialized read responses.
+
+Every write bumps its collection's version in the database, in the same
+transaction as the write (see storage.py). A read endpoint's ETag is
+derived from the versions of the collections it reads plus its path and
+query string, so a client presenting a current ETag gets a 304 without the
+payload being queried or serialized. Otherwise the serialized body comes
+from an LRU keyed the same way and is only built on a miss. Writes made by
+this process also drop the collection's entries right away.
+
+Bodies are encoded with serialization.py; compressed copies are kept
+alongside each cached body so they are only compressed once.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response
+
+from serialization import dumps, encode_body, project
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_SIZE", "512"))
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Compare ignoring weakness and the content-encoding suffix"""
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip().removeprefix("W/").strip('"')
+        if candidate.split("-")[0] == etag:
+            return True
+    return False
+
+
+def _matches_any(header: Optional[str]) -> bool:
+    """If-None-Match: * (only meaningful once the resource is known to exist)"""
+    return bool(header) and any(c.strip() == "*" for c in header.split(","))
+
+
+class ResponseCache:
+    """LRU of serialized responses keyed by URL and collection versions"""
+
+    def __init__(self, storage, max_entries: Optional[int] = None):
+        self.storage = storage
+        self.max_entries = DEFAULT_MAX_ENTRIES if max_entries is None else max_entries
+        # key -> (collections, body, compressed variants, headers)
+        self._entries: "OrderedDict[str, Tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def respond(
+        self,
+        request: Request,
+        collections: Iterable[str],
+        build: Callable[[Dict[str, str]], Awaitable],
+        fields: List[str],
+        extra: str = "",
+    ) -> Response:
+        """
+        Serve a read endpoint. build(headers) produces the stored rows (and
+        may add response headers); it is only awaited when the response is
+        not cached. Rows are projected onto fields. extra covers anything
+        besides the collections the data depends on.
+        """
+        collections = tuple(sorted(collections))
+        versions = await self.storage.collection_versions(collections)
+        key = "|".join([
+            request.url.path,
+            str(request.query_params),
+            ",".join(f"{name}:{versions[name]}" for name in collections),
+            extra,
+        ])
+        etag = hashlib.blake2b(key.encode(), digest_size=12).hexdigest()
+        cache_headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if _etag_matches(if_none_match, etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers={**cache_headers, "ETag": f'"{etag}"'})
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            _, body, variants, headers = entry
+        else:
+            self.misses += 1
+            headers: Dict[str, str] = {}
+            body = dumps(project(await build(headers), fields))
+            variants: Dict[str, bytes] = {}
+            if self.max_entries > 0:
+                self._entries[key] = (collections, body, variants, headers)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+        # Checked after build(), which raises for a missing resource
+        if _matches_any(if_none_match):
+            self.not_modified += 1
+            return Response(status_code=304, headers={**cache_headers, "ETag": f'"{etag}"'})
+
+        content, encoding = encode_body(body, request.headers.get("accept-encoding"), variants)
+        if encoding:
+            # Each encoding is its own representation with its own ETag
+            cache_headers["Content-Encoding"] = encoding
+            etag = f"{etag}-{encoding}"
+        return Response(
+            content=content,
+            media_type="application/json",
+            headers={**headers, **cache_headers, "ETag": f'"{etag}"'},
+        )
+
+    def invalidate(self, collection: str):
+        """Drop cached responses that depend on a collection"""
+        stale = [key for key, entry in self._entries.items() if collection in entry[0]]
+        for key in stale:
+            del self._entries[key]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,194 @@
+"""
+Full-text search over jobs and contacts with SQLite FTS5.
+
+jobs_fts and contacts_fts are external-content FTS5 indexes over the
+searchable columns. Their documents are numbered in jobs_fts_docs and
+contacts_fts_docs rather than by the tables' own rowids: those tables
+have TEXT primary keys, so VACUUM may renumber their rowids. Triggers on
+jobs and contacts update them in the same transaction as every insert,
+delete and change to an indexed column, so the index is never rebuilt.
+Queries match every word as a prefix (for search-as-you-type) and are
+ranked with BM25, with company/name and position/role weighted above
+free-text notes.
+
+Prefixes of up to six characters have their own index entries, so short
+queries read one posting list instead of merging thousands. Queries that
+match a large part of the collection only rank the most recently added
+RANK_CANDIDATES matches, plus the most recent RANK_CANDIDATES whose
+company/position (contact name/role) match, which bounds the BM25 work
+per keystroke without losing an older job whose company is the query.
+Snippets are highlighted in Python on the returned rows only, and are
+HTML: the matched words are wrapped in <mark> and the text is escaped.
+"""
+
+import html
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+JOB_COLUMNS = ["company", "position", "location", "notes", "description"]
+JOB_WEIGHTS = [10.0, 8.0, 3.0, 1.0, 1.0]
+CONTACT_COLUMNS = ["name", "role", "notes"]
+CONTACT_WEIGHTS = [10.0, 5.0, 1.0]
+# Columns whose matches are ranked even when they are not among the newest
+TITLE_COLUMNS = {"jobs": ["company", "position"], "contacts": ["name", "role"]}
+
+DOCUMENT_TYPES = ("job", "contact")
+
+RANK_CANDIDATES = 500
+SNIPPET_WORDS = 12
+
+_WORD = re.compile(r"\w+")
+
+
+def _fts_table(table: str, columns: List[str]) -> str:
+    """
+    FTS5 index over table.columns, numbered by a {table}_fts_docs id map,
+    plus the triggers that keep both current
+    """
+    cols = ", ".join(columns)
+    source = ", ".join(f"t.{c}" for c in columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    changed = " OR ".join(f"old.{c} IS NOT new.{c}" for c in columns)
+    new_docid = f"(SELECT docid FROM {table}_fts_docs WHERE id = new.id)"
+    old_docid = f"(SELECT docid FROM {table}_fts_docs WHERE id = old.id)"
+    return f"""
+    CREATE TABLE {table}_fts_docs (docid INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE);
+    INSERT INTO {table}_fts_docs (id) SELECT id FROM {table} ORDER BY rowid;
+    CREATE VIEW {table}_fts_content AS
+        SELECT d.docid, {source} FROM {table}_fts_docs d JOIN {table} t ON t.id = d.id;
+    CREATE VIRTUAL TABLE {table}_fts USING fts5(
+        {cols}, content='{table}_fts_content', content_rowid='docid',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3 4 5 6'
+    );
+    INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');
+    CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts_docs (id) VALUES (new.id);
+        INSERT INTO {table}_fts (rowid, {cols}) VALUES ({new_docid}, {new});
+    END;
+    CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, {cols})
+            VALUES ('delete', {old_docid}, {old});
+        DELETE FROM {table}_fts_docs WHERE id = old.id;
+    END;
+    CREATE TRIGGER {table}_fts_update AFTER UPDATE ON {table} WHEN {changed} BEGIN
+        INSERT INTO {table}_fts ({table}_fts, rowid, {cols})
+            VALUES ('delete', {old_docid}, {old});
+        INSERT INTO {table}_fts (rowid, {cols}) VALUES ({new_docid}, {new});
+    END;
+    """
+
+
+MIGRATION = _fts_table("jobs", JOB_COLUMNS) + _fts_table("contacts", CONTACT_COLUMNS)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn user input into an FTS5 query: every word, each as a prefix"""
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _fold(text: str) -> str:
+    """Lowercase and strip accents, as the unicode61 tokenizer does"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def highlight(text: Optional[str], prefixes: List[str]) -> Optional[str]:
+    """A few words of HTML-escaped text around the first match, matches wrapped in <mark>"""
+    if not text:
+        return None
+    words = list(_WORD.finditer(text))
+    hits = {
+        i for i, word in enumerate(words)
+        if any(_fold(word.group()).startswith(prefix) for prefix in prefixes)
+    }
+    if not hits:
+        return None
+    start = max(0, min(hits) - SNIPPET_WORDS // 3)
+    end = min(len(words), start + SNIPPET_WORDS)
+    parts = ["…" if start > 0 else ""]
+    position = words[start].start()
+    for i in range(start, end):
+        word = words[i]
+        parts.append(html.escape(text[position:word.start()]))
+        escaped = html.escape(word.group())
+        parts.append(f"<mark>{escaped}</mark>" if i in hits else escaped)
+        position = word.end()
+    parts.append("…" if end < len(words) else html.escape(text[position:]))
+    return "".join(parts)
+
+
+def _ranked(conn, table: str, weights: List[float], query: str, limit: int) -> List:
+    """Rows of table matching query, best BM25 score first"""
+    fts = f"{table}_fts"
+    titles = f"{{{' '.join(TITLE_COLUMNS[table])}}} : ({query})"
+    # Only rank the newest RANK_CANDIDATES matches of very broad queries,
+    # and as many title matches
+    floor = conn.execute(
+        f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+        (query, RANK_CANDIDATES - 1),
+    ).fetchone()
+    bm25 = f"bm25({fts}, {', '.join(str(w) for w in weights)})"
+    return conn.execute(
+        f"""
+        SELECT t.*, hits.score FROM (
+            SELECT rowid, {bm25} AS score FROM {fts}
+            WHERE {fts} MATCH ? AND (rowid >= ? OR rowid IN (
+                SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT ?
+            ))
+            ORDER BY score LIMIT ?
+        ) hits
+        JOIN {fts}_docs d ON d.docid = hits.rowid
+        JOIN {table} t ON t.id = d.id
+        ORDER BY hits.score
+        """,
+        (query, floor[0] if floor else 0, titles, RANK_CANDIDATES, limit),
+    ).fetchall()
+
+
+def _snippet(row, columns: List[str], prefixes: List[str]) -> Dict:
+    for column in columns:
+        snippet = highlight(row[column], prefixes)
+        if snippet:
+            return {"field": column, "snippet": snippet}
+    return {"field": None, "snippet": None}
+
+
+def search(conn, text: str, types=DOCUMENT_TYPES, limit: int = 20) -> List[Dict]:
+    """Best matches across jobs and contacts, best first"""
+    query = fts_query(text)
+    if query is None:
+        return []
+    prefixes = [_fold(word) for word in _WORD.findall(text)]
+    results = []
+    if "job" in types:
+        results += [
+            {
+                "type": "job",
+                "id": row["id"],
+                "title": f"{row['position']} at {row['company']}",
+                "status": row["status"],
+                "location": row["location"],
+                **_snippet(row, JOB_COLUMNS, prefixes),
+                "score": round(-row["score"], 6),
+            }
+            for row in _ranked(conn, "jobs", JOB_WEIGHTS, query, limit)
+        ]
+    if "contact" in types:
+        results += [
+            {
+                "type": "contact",
+                "id": row["id"],
+                "title": row["name"] + (f" ({row['role']})" if row["role"] else ""),
+                "job_id": row["job_id"],
+                **_snippet(row, CONTACT_COLUMNS, prefixes),
+                "score": round(-row["score"], 6),
+            }
+            for row in _ranked(conn, "contacts", CONTACT_WEIGHTS, query, limit)
+        ]
+    results.sort(key=lambda result: result["score"], reverse=True)
+    return results[:limit]
@@ -43,19 +43,25 @@ def main():
         print("You can manually download it later with:")
         print("python -m spacy download en_core_web_sm")
 
-    # Download nltk packages
+    # Download nltk packages into the local data directory the server reads
+    # from (the server itself never downloads anything)
     print("Downloading nltk dependencies")
-    if nltk.download("stopwords"):
-        print("\n Sucessfully downloaded nltk packages")
+    nltk_data_dir = os.getenv(
+        "CV_NLTK_DATA",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "nltk_data"),
+    )
+    packages = [
+        "punkt",
+        "averaged_perceptron_tagger",
+        "maxent_ne_chunker",
+        "words",
+        "stopwords",
+    ]
+    if all(nltk.download(p, download_dir=nltk_data_dir, quiet=True) for p in packages):
+        print(f"\n Sucessfully downloaded nltk packages to {nltk_data_dir}")
     else:
         print("Issue in nltk download")
 
-    # Create uploads directory
-    uploads_dir = "uploads"
-    if not os.path.exists(uploads_dir):
-        os.makedirs(uploads_dir)
-        print(f"✅ Created {uploads_dir} directory")
-
     print("\n🎉 Setup completed!")
     print("\nTo start the backend server:")
     print("1. Activate the virtual environment: source .venv/bin/activate")
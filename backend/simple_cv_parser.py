@@ -1,111 +1,260 @@
+import io
 import os
 import tempfile
 import re
-from typing import Dict, List
+from datetime import date
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 from pathlib import Path
-import pdfplumber
-from docx import Document
+
+from cv_pipeline import CVDocument, provenance
+from cv_sections import SegmentedCV, segment_cv
+from docx_extract import extract_word_text
+from pdf_extract import PdfText, extract_pdf, import_backends
+from skill_matcher import get_skill_matcher
+from telemetry import log, span
+
+# Patterns are compiled once at import; extractors only run them over the
+# section of the CV they care about.
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERNS = [
+    re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'),  # US format
+    re.compile(r'\b\(\d{3}\)\s*\d{3}[-.]?\d{4}\b'),  # (123) 456-7890
+    re.compile(r'\+\d{1,3}[-.\s]?\d{3,4}[-.\s]?\d{3,4}[-.\s]?\d{3,4}\b'),  # International
+]
+YEARS_OF_EXPERIENCE_PATTERN = re.compile(
+    r'(\d+)\+?\s*years?\s*(?:of\s*)?experience|experience:?\s*(\d+)\+?\s*years?',
+    re.IGNORECASE,
+)
+EDUCATION_KEYWORDS = [
+    "Bachelor", "Master", "PhD", "Doctorate", "MBA", "B.S.", "M.S.",
+    "Computer Science", "Engineering", "Business", "Mathematics"
+]
+EDUCATION_KEYWORD_PATTERN = re.compile(
+    r'(?<!\w)(?:' + '|'.join(re.escape(k) for k in EDUCATION_KEYWORDS) + r')',
+    re.IGNORECASE,
+)
+DEGREE_PATTERN = re.compile(
+    r'(?<!\w)(?:bachelor|master|doctorate|ph\.?\s?d|mba|associate|diploma|'
+    r'b\.?\s?sc?\b\.?|m\.?\s?sc?\b\.?|b\.?\s?a\.|m\.?\s?a\.|b\.?\s?tech|m\.?\s?tech|'
+    r'b\.?\s?eng|m\.?\s?eng|b\.?\s?e\.)',
+    re.IGNORECASE,
+)
+INSTITUTION_PATTERN = re.compile(
+    r'\b(?:university|college|institute|school|academy|polytechnic)\b', re.IGNORECASE
+)
+YEAR_PATTERN = re.compile(r'\b(?:19|20)\d{2}\b')
+_MONTH = (
+    r'(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|'
+    r'sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?'
+)
+_DATE = r'(?:' + _MONTH + r'\s+\d{4}|\d{1,2}/\d{4}|\d{4})'
+DATE_RANGE_PATTERN = re.compile(
+    r'(?P<start>' + _DATE + r')\s*(?:-|–|—|to|until)\s*'
+    r'(?P<end>' + _DATE + r'|present|current|now|today)',
+    re.IGNORECASE,
+)
+BULLET_PATTERN = re.compile(r'^\s*(?:[-*•●▪◦‣–]|\d+[.)])\s+')
+MONTHS = {m: i for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"], 1
+)}
+
+
+def _file_ext(source: Union[str, BinaryIO], filename: Optional[str] = None) -> str:
+    """Extension of filename, or of the path or file object's name"""
+    if not filename:
+        filename = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    return Path(str(filename)).suffix.lower()
+
+
+def get_temp_dir() -> str:
+    """Directory for the few temp files parsing still needs (prefers tmpfs)"""
+    temp_dir = os.getenv("CV_TEMP_DIR")
+    if temp_dir:
+        Path(temp_dir).mkdir(parents=True, exist_ok=True)
+        return temp_dir
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
 
 class SimpleCVParser:
     """A simple CV parser that doesn't rely on pyresparser for debugging"""
+
+    VERSION = "1.6"
     
     def __init__(self):
-        pass
+        # Compile the skill taxonomy and import the PDF libraries up front
+        # (in the worker) rather than on the first CV
+        get_skill_matcher()
+        import_backends()
     
     def parse_cv(self, file_path: str) -> Dict:
         """Parse CV and extract basic information"""
         try:
-            # Extract text based on file type
-            text = self.extract_text(file_path)
-            
-            if not text:
+            return self.parse_document(self.load_document(file_path))
+        except Exception as e:
+            return self.get_empty_response(f"Error parsing CV: {str(e)}")
+
+    def parse_cv_bytes(self, file_content: bytes, filename: str) -> Dict:
+        """Parse CV straight from the uploaded bytes, without a temp file"""
+        try:
+            return self.parse_document(self.load_document(io.BytesIO(file_content), filename))
+        except Exception as e:
+            return self.get_empty_response(f"Error parsing CV: {str(e)}")
+
+    def load_document(
+        self, source: Union[str, BinaryIO], filename: Optional[str] = None
+    ) -> CVDocument:
+        """Extract a CV's text once, for any parsing engine to use"""
+        name = filename or str(source)
+        page_count = None
+        with span("extract_text"):
+            if Path(name).suffix.lower() == ".pdf":
+                pdf = self.read_pdf(source)
+                text = pdf.text if pdf else ""
+                page_count = pdf.page_count if pdf else None
+            else:
+                text = self.extract_text(source, filename)
+        return CVDocument(filename=Path(name).name, text=text, page_count=page_count)
+
+    def parse_document(self, document: CVDocument) -> Dict:
+        """Parse an already extracted CV"""
+        try:
+            if not document.text:
                 return self.get_empty_response("Could not extract text from file")
-            
-            # Extract information using simple regex patterns
-            personal_info = self.extract_personal_info(text)
-            skills = self.extract_skills(text)
-            experience = self.extract_experience(text)
-            education = self.extract_education(text)
-            
-            parsed_data = {
-                "personal_info": personal_info,
-                "skills": skills,
-                "experience": experience,
-                "education": education,
-                "projects": [],
-                "ats_analysis": self.analyze_ats_compatibility(text, personal_info, skills, education),
-                "raw_data": {"extracted_text": text[:500] + "..." if len(text) > 500 else text}
-            }
-            
-            return parsed_data
-            
+            # Normalized and split into sections once; each extractor only
+            # scans the section(s) it needs
+            return self.parse_segmented(document.segmented)
         except Exception as e:
             return self.get_empty_response(f"Error parsing CV: {str(e)}")
+
+    def parse_text(self, text: str) -> Dict:
+        """Extract structured information from already extracted CV text"""
+        return self.parse_document(CVDocument(filename="", text=text))
+
+    def parse_segmented(self, cv: SegmentedCV) -> Dict:
+        """Run the extractors over a segmented CV"""
+        text = cv.text
+        with span("extract_personal_info"):
+            personal_info = self.extract_personal_info(cv.scope("contact"), fallback_text=text)
+        with span("extract_skills"):
+            skills = self.extract_skills(cv.scope("skills"))
+        with span("extract_experience"):
+            experience = self.extract_experience(cv.scope("contact", "summary", "experience"))
+        with span("extract_education"):
+            education = self.extract_education(cv.scope("education"))
+        with span("extract_projects"):
+            projects = self.extract_projects(cv.section_text("projects"))
+        with span("analyze_ats_compatibility"):
+            ats_analysis = self.analyze_ats_compatibility(text, personal_info, skills, education)
+        
+        parsed_data = {
+            "personal_info": personal_info,
+            "skills": skills,
+            "experience": experience,
+            "education": education,
+            "projects": projects,
+            "ats_analysis": ats_analysis,
+            "raw_data": {
+                "extracted_text": text[:500] + "..." if len(text) > 500 else text,
+                "sections": cv.offsets(),
+            }
+        }
+        parsed_data["provenance"] = provenance(parsed_data, "simple")
+        # The full normalized text, for editing sessions (see cv_sessions.py);
+        # not part of the API response
+        parsed_data["document_text"] = text
+        
+        return parsed_data
     
-    def extract_text(self, file_path: str) -> str:
-        """Extract text from PDF or DOCX file"""
-        file_ext = Path(file_path).suffix.lower()
+    def extract_contact_info(
+        self, source: Union[str, BinaryIO], filename: Optional[str] = None
+    ) -> Dict:
+        """
+        Name, email and phone number. PDFs are read from the first page
+        only, unless it lacks the email or phone number.
+        """
+        text = self.extract_text(source, filename, max_pages=1)
+        info = self.extract_personal_info(segment_cv(text).scope("contact"), fallback_text=text)
+        if _file_ext(source, filename) == ".pdf" and not (info["email"] and info["mobile_number"]):
+            text = self.extract_text(source, filename)
+            info = self.extract_personal_info(segment_cv(text).scope("contact"), fallback_text=text)
+        return info
+
+    def extract_text(
+        self,
+        source: Union[str, BinaryIO],
+        filename: Optional[str] = None,
+        max_pages: Optional[int] = None,
+    ) -> str:
+        """Extract text from a PDF or DOCX path or in-memory file object"""
+        file_ext = _file_ext(source, filename)
         
         try:
             if file_ext == '.pdf':
-                return self.extract_pdf_text(file_path)
+                return self.extract_pdf_text(source, max_pages)
             elif file_ext in ['.doc', '.docx']:
-                return self.extract_docx_text(file_path)
+                return self.extract_docx_text(source)
             else:
                 return ""
         except Exception as e:
-            print(f"Error extracting text: {e}")
+            log.error("Error extracting text: %s", e)
             return ""
     
-    def extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF"""
-        text = ""
+    def extract_pdf_text(
+        self, source: Union[str, BinaryIO], max_pages: Optional[int] = None
+    ) -> str:
+        """Extract text from PDF (see pdf_extract.py for backends and limits)"""
+        pdf = self.read_pdf(source, max_pages)
+        return pdf.text if pdf else ""
+
+    def read_pdf(
+        self, source: Union[str, BinaryIO], max_pages: Optional[int] = None
+    ) -> Optional[PdfText]:
+        """Pages of a PDF, or None when it can't be read"""
         try:
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            pdf = extract_pdf(source, max_pages=max_pages)
         except Exception as e:
-            print(f"Error reading PDF: {e}")
-        return text
+            log.error("Error reading PDF: %s", e)
+            return None
+        if pdf.truncated and max_pages is None:
+            log.warning(
+                "⚠️ Read %d of %d PDF pages (%s)", len(pdf.pages), pdf.page_count, pdf.backend
+            )
+        return pdf
     
-    def extract_docx_text(self, file_path: str) -> str:
-        """Extract text from DOCX"""
-        text = ""
+    def extract_docx_text(self, source: Union[str, BinaryIO]) -> str:
+        """Extract text from DOCX (or legacy DOC, see docx_extract.py)"""
         try:
-            doc = Document(file_path)
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
+            return extract_word_text(source)
         except Exception as e:
-            print(f"Error reading DOCX: {e}")
-        return text
+            log.error("Error reading DOCX: %s", e)
+            return ""
     
-    def extract_personal_info(self, text: str) -> Dict:
+    def extract_personal_info(self, text: str, fallback_text: Optional[str] = None) -> Dict:
         """Extract personal information using regex"""
         personal_info = {"name": "", "email": "", "mobile_number": ""}
         
-        # Extract email
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        email_match = re.search(email_pattern, text)
-        if email_match:
-            personal_info["email"] = email_match.group()
+        # Contact details are usually in the header but sometimes in a footer
+        search_texts = [text] if fallback_text is None else [text, fallback_text]
         
-        # Extract phone number (simple patterns)
-        phone_patterns = [
-            r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',  # US format
-            r'\b\(\d{3}\)\s*\d{3}[-.]?\d{4}\b',  # (123) 456-7890
-            r'\+\d{1,3}[-.\s]?\d{3,4}[-.\s]?\d{3,4}[-.\s]?\d{3,4}\b'  # International
-        ]
+        for search_text in search_texts:
+            email_match = EMAIL_PATTERN.search(search_text)
+            if email_match:
+                personal_info["email"] = email_match.group()
+                break
         
-        for pattern in phone_patterns:
-            phone_match = re.search(pattern, text)
-            if phone_match:
-                personal_info["mobile_number"] = phone_match.group()
+        for search_text in search_texts:
+            for pattern in PHONE_PATTERNS:
+                phone_match = pattern.search(search_text)
+                if phone_match:
+                    personal_info["mobile_number"] = phone_match.group()
+                    break
+            if personal_info["mobile_number"]:
                 break
         
         # Extract name (first line that looks like a name)
-        lines = text.split('\n')
+        lines = text.split('\n', 5)
         for line in lines[:5]:  # Check first 5 lines
             line = line.strip()
             if len(line.split()) == 2 and line.replace(' ', '').isalpha() and len(line) > 5:
@@ -115,20 +264,8 @@ class SimpleCVParser:
         return personal_info
     
     def extract_skills(self, text: str) -> Dict:
-        """Extract skills using common programming/technical terms"""
-        common_skills = [
-            "Python", "Java", "JavaScript", "React", "Node.js", "SQL", "HTML", "CSS",
-            "Git", "Docker", "AWS", "Azure", "MongoDB", "PostgreSQL", "MySQL",
-            "FastAPI", "Django", "Flask", "Express", "Vue.js", "Angular",
-            "Machine Learning", "Data Science", "TensorFlow", "Pandas", "NumPy"
-        ]
-        
-        found_skills = []
-        text_lower = text.lower()
-        
-        for skill in common_skills:
-            if skill.lower() in text_lower:
-                found_skills.append(skill)
+        """Extract skills with the compiled skill taxonomy matcher"""
+        found_skills = get_skill_matcher().find(text)
         
         return {
             "technical_skills": found_skills,
@@ -137,43 +274,170 @@ class SimpleCVParser:
     
     def extract_experience(self, text: str) -> Dict:
         """Extract experience information"""
-        # Look for years of experience patterns
-        exp_patterns = [
-            r'(\d+)\+?\s*years?\s*of\s*experience',
-            r'(\d+)\+?\s*years?\s*experience',
-            r'experience:?\s*(\d+)\+?\s*years?'
-        ]
+        entries = self._split_dated_entries(text)
+        details = []
+        for title, start, end, description in entries:
+            details.append({
+                "title": title,
+                "start_date": self._format_month(start),
+                "end_date": "present" if end is None else self._format_month(end),
+                "duration_months": self._months_between(start, end),
+                "description": "\n".join(description),
+            })
         
-        total_exp = 0
-        for pattern in exp_patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                total_exp = int(match.group(1))
-                break
+        # An explicit "N years of experience" wins over summing the roles
+        match = YEARS_OF_EXPERIENCE_PATTERN.search(text)
+        if match:
+            total_exp = int(match.group(1) or match.group(2))
+        else:
+            total_exp = self._total_years([(start, end) for _, start, end, _ in entries])
         
         return {
             "total_experience": total_exp,
-            "experience_details": []
+            "experience_details": details
         }
     
     def extract_education(self, text: str) -> Dict:
         """Extract education information"""
-        education_keywords = [
-            "Bachelor", "Master", "PhD", "Doctorate", "MBA", "B.S.", "M.S.",
-            "Computer Science", "Engineering", "Business", "Mathematics"
-        ]
+        matched = {m.group().lower() for m in EDUCATION_KEYWORD_PATTERN.finditer(text)}
+        found_education = [k for k in EDUCATION_KEYWORDS if k.lower() in matched]
         
-        found_education = []
-        for keyword in education_keywords:
-            if keyword.lower() in text.lower():
-                found_education.append(keyword)
+        details = []
+        for block in self._split_blocks(text, DEGREE_PATTERN):
+            degree_line = next((line for line in block if DEGREE_PATTERN.search(line)), "")
+            institution = next((line for line in block if INSTITUTION_PATTERN.search(line)), "")
+            years = YEAR_PATTERN.findall(" ".join(block))
+            details.append({
+                "degree": self._strip_dates(degree_line),
+                "institution": self._strip_dates(institution),
+                "year": years[-1] if years else "",
+                "description": "\n".join(block),
+            })
         
         return {
             "degree": found_education,
-            "education_details": []
+            "education_details": details
         }
     
-    def analyze_ats_compatibility(self, text: str, personal_info: Dict, skills: Dict, education: Dict) -> Dict:
+    def extract_projects(self, text: str) -> List[Dict]:
+        """Extract projects from the projects section"""
+        matcher = get_skill_matcher()
+        projects = []
+        for block in self._split_blocks(text):
+            block_text = "\n".join(block)
+            projects.append({
+                "name": self._strip_dates(BULLET_PATTERN.sub("", block[0])),
+                "description": "\n".join(BULLET_PATTERN.sub("", line) for line in block[1:]),
+                "technologies": matcher.find(block_text),
+            })
+        return projects
+    
+    def _split_dated_entries(self, text: str) -> List[Tuple[str, Tuple[int, int], Optional[Tuple[int, int]], List[str]]]:
+        """Split a section into entries that start at a line with a date range"""
+        entries = []
+        current = None
+        previous_line = ""
+        for line in text.split('\n'):
+            line = line.strip()
+            if not line:
+                continue
+            match = DATE_RANGE_PATTERN.search(line)
+            start = self._parse_month(match.group("start")) if match else None
+            if start:
+                title = self._strip_dates(line)
+                if not title and previous_line:
+                    # Dates on their own line: the title is the line above
+                    title = previous_line
+                    if current and current[3] and current[3][-1] == previous_line:
+                        current[3].pop()
+                current = (title, start, self._parse_month(match.group("end")), [])
+                entries.append(current)
+            elif current is not None:
+                current[3].append(BULLET_PATTERN.sub("", line))
+            previous_line = "" if BULLET_PATTERN.match(line) else line
+        return entries
+    
+    def _split_blocks(self, text: str, starts_block: Optional[re.Pattern] = None) -> List[List[str]]:
+        """Split a section into blocks at blank lines (or at lines matching starts_block)"""
+        blocks = []
+        current: List[str] = []
+        previous_was_bullet = False
+        for line in text.split('\n'):
+            line = line.strip()
+            is_bullet = bool(BULLET_PATTERN.match(line))
+            new_block = not line or (
+                current and (
+                    (starts_block is not None and starts_block.search(line)
+                     and any(starts_block.search(l) for l in current))
+                    or (starts_block is None and previous_was_bullet and not is_bullet)
+                )
+            )
+            if new_block and current:
+                blocks.append(current)
+                current = []
+            if line:
+                current.append(line)
+            previous_was_bullet = is_bullet
+        if current:
+            blocks.append(current)
+        return blocks
+    
+    def _strip_dates(self, line: str) -> str:
+        line = DATE_RANGE_PATTERN.sub("", line)
+        return line.strip(" \t|,;:-–—()")
+    
+    def _parse_month(self, value: str) -> Optional[Tuple[int, int]]:
+        """Parse "Jan 2020", "01/2020", "2020" or "present" into (year, month)"""
+        value = value.strip().lower().rstrip(".")
+        if value in ("present", "current", "now", "today"):
+            return None
+        if "/" in value:
+            month, year = value.split("/")
+            return int(year), min(max(int(month), 1), 12)
+        parts = value.split()
+        if len(parts) == 2:
+            return int(parts[1]), MONTHS.get(parts[0][:3], 1)
+        return int(value), 1
+    
+    def _format_month(self, value: Tuple[int, int]) -> str:
+        return f"{value[0]:04d}-{value[1]:02d}"
+    
+    def _months_between(self, start: Tuple[int, int], end: Optional[Tuple[int, int]]) -> int:
+        if end is None:
+            today = date.today()
+            end = (today.year, today.month)
+        return max((end[0] - start[0]) * 12 + end[1] - start[1], 0)
+    
+    def _total_years(self, ranges: List[Tuple[Tuple[int, int], Optional[Tuple[int, int]]]]) -> float:
+        """Total years covered by the date ranges, counting overlaps once"""
+        today = date.today()
+        intervals = []
+        for start, end in ranges:
+            end = end or (today.year, today.month)
+            intervals.append((start[0] * 12 + start[1], end[0] * 12 + end[1]))
+        intervals.sort()
+        months = 0
+        current_start, current_end = None, None
+        for start, end in intervals:
+            if current_end is None or start > current_end:
+                if current_end is not None:
+                    months += current_end - current_start
+                current_start, current_end = start, end
+            else:
+                current_end = max(current_end, end)
+        if current_end is not None:
+            months += current_end - current_start
+        return round(max(months, 0) / 12, 1)
+    
+    @classmethod
+    def score_result(cls, result: Dict) -> Dict:
+        """ATS analysis of a parse result (e.g. one merged from several engines)"""
+        return cls.analyze_ats_compatibility(
+            "", result["personal_info"], result["skills"], result["education"]
+        )
+
+    @classmethod
+    def analyze_ats_compatibility(cls, text: str, personal_info: Dict, skills: Dict, education: Dict) -> Dict:
         """Simple ATS analysis"""
         score = 0
         feedback = []
@@ -222,10 +486,11 @@ class SimpleCVParser:
         return {
             "score": min(score, 100),
             "feedback": feedback,
-            "grade": self.get_ats_grade(score)
+            "grade": cls.get_ats_grade(score)
         }
     
-    def get_ats_grade(self, score: int) -> str:
+    @staticmethod
+    def get_ats_grade(score: int) -> str:
         """Convert score to letter grade"""
         if score >= 90:
             return "A+ (Excellent)"
@@ -249,27 +514,3 @@ class SimpleCVParser:
             "ats_analysis": {"score": 0, "feedback": [f"❌ {error_msg}"], "grade": "Error"},
             "raw_data": {"error": error_msg}
         }
-    
-    def save_uploaded_file(self, file_content: bytes, filename: str) -> str:
-        """Save uploaded file temporarily and return path"""
-        upload_dir = Path("uploads")
-        upload_dir.mkdir(exist_ok=True)
-        
-        suffix = Path(filename).suffix
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False, 
-            suffix=suffix,
-            dir=upload_dir
-        )
-        
-        temp_file.write(file_content)
-        temp_file.close()
-        
-        return temp_file.name
-
-    def cleanup_file(self, file_path: str):
-        """Remove temporary file"""
-        try:
-            os.unlink(file_path)
-        except Exception:
-            pass
\ No newline at end of file
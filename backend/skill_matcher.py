@@ -0,0 +1,164 @@
+"""
+Compiled multi-pattern skill matcher.
+
+The skill taxonomy (canonical names plus synonyms) is compiled once into a
+single trie-shaped regular expression with token boundaries, so extracting
+skills is one linear scan over the text however large the taxonomy grows,
+and "Java" no longer matches inside "JavaScript".
+
+Taxonomy files are either JSON::
+
+    {"skills": {"JavaScript": ["JS", "ECMAScript"],
+                "Go": {"synonyms": ["Golang"], "case_sensitive": true},
+                "Node.js": {"synonyms": ["NodeJS"],
+                            "case_sensitive_synonyms": ["Node"]}}}
+
+or CSV with the canonical name in the first column and synonyms after it.
+Terms that are ordinary English words ("Go", "Excel", "REST") are matched
+case-sensitively only.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TAXONOMY_PATH = Path(__file__).parent / "data" / "skill_taxonomy.json"
+
+# A skill must not be glued to other word characters on either side.
+# "+", "#" and "&" count as word characters ("C" vs "C++"/"C#", "R&D"),
+# and a trailing ".word" blocks "Vue" inside "Vue.js".
+_LEFT_BOUNDARY = r"(?<![\w+#&.])"
+_RIGHT_BOUNDARY = r"(?![\w+#&]|\.\w)"
+
+
+def normalize_term(term: str) -> str:
+    """Collapse whitespace so "Machine  Learning" matches "Machine Learning\""""
+    return " ".join(term.split())
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """Build a regex alternation shaped like a trie of the given terms"""
+    trie: Dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            token = r"\s+" if char == " " else re.escape(char)
+            branches.append(token + build(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy optional: prefer the longer skill, back off to this one
+            if len(branches) == 1:
+                body = "(?:" + body + ")"
+            return body + "?"
+        return body
+
+    return build(trie)
+
+
+class SkillMatcher:
+    """Find canonical skills in text with one compiled regex"""
+
+    def __init__(self, taxonomy: Dict, fingerprint: str = ""):
+        self.fingerprint = fingerprint
+        self._insensitive: Dict[str, str] = {}
+        self._sensitive: Dict[str, str] = {}
+
+        for canonical, entry in taxonomy.items():
+            if isinstance(entry, dict):
+                synonyms = entry.get("synonyms", [])
+                case_sensitive = entry.get("case_sensitive", False)
+                sensitive_synonyms = entry.get("case_sensitive_synonyms", [])
+            else:
+                synonyms, case_sensitive, sensitive_synonyms = entry, False, []
+
+            for term in [canonical, *synonyms]:
+                term = normalize_term(term)
+                if case_sensitive:
+                    self._sensitive.setdefault(term, canonical)
+                else:
+                    self._insensitive.setdefault(term.lower(), canonical)
+            for term in sensitive_synonyms:
+                self._sensitive.setdefault(normalize_term(term), canonical)
+
+        alternatives = []
+        if self._insensitive:
+            alternatives.append(f"(?P<ci>(?i:{_trie_pattern(self._insensitive)}))")
+        if self._sensitive:
+            alternatives.append(f"(?P<cs>{_trie_pattern(self._sensitive)})")
+        if alternatives:
+            self._pattern = re.compile(
+                _LEFT_BOUNDARY + "(?:" + "|".join(alternatives) + ")" + _RIGHT_BOUNDARY
+            )
+        else:
+            self._pattern = None
+
+    @classmethod
+    def from_file(cls, path) -> "SkillMatcher":
+        """Load and compile a JSON or CSV taxonomy file"""
+        path = Path(path)
+        raw = path.read_bytes()
+        fingerprint = hashlib.sha256(raw).hexdigest()[:12]
+        if path.suffix.lower() == ".csv":
+            taxonomy = {}
+            for row in csv.reader(raw.decode("utf-8").splitlines()):
+                terms = [term.strip() for term in row if term.strip()]
+                if terms and not terms[0].startswith("#"):
+                    taxonomy.setdefault(terms[0], []).extend(terms[1:])
+        else:
+            data = json.loads(raw)
+            taxonomy = data.get("skills", data)
+        return cls(taxonomy, fingerprint)
+
+    @property
+    def size(self) -> int:
+        """Number of distinct terms (canonical names and synonyms)"""
+        return len(self._insensitive) + len(self._sensitive)
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[str, int]]:
+        """Yield (canonical skill, offset) for every match in text"""
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text):
+            groups = match.groupdict()
+            if groups.get("ci") is not None:
+                canonical = self._insensitive.get(normalize_term(groups["ci"]).lower())
+            else:
+                canonical = self._sensitive.get(normalize_term(groups["cs"]))
+            if canonical:
+                yield canonical, match.start()
+
+    def find(self, text: str) -> List[str]:
+        """Canonical skills in text, in order of first appearance"""
+        return list(dict.fromkeys(skill for skill, _ in self.iter_matches(text)))
+
+    def count(self, text: str) -> Dict[str, int]:
+        """How often each canonical skill occurs in text"""
+        counts: Dict[str, int] = {}
+        for skill, _ in self.iter_matches(text):
+            counts[skill] = counts.get(skill, 0) + 1
+        return counts
+
+
+_default_matcher: Optional[SkillMatcher] = None
+
+
+def get_skill_matcher() -> SkillMatcher:
+    """Process-wide matcher for the configured taxonomy (compiled on first use)"""
+    global _default_matcher
+    if _default_matcher is None:
+        path = os.getenv("CV_SKILL_TAXONOMY") or DEFAULT_TAXONOMY_PATH
+        _default_matcher = SkillMatcher.from_file(path)
+    return _default_matcher
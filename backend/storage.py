@@ -0,0 +1,625 @@
+"""
+SQLite storage for jobs, contacts and user profiles.
+
+The database runs in WAL mode so readers never block the writer. Queries go
+through a small pool of connections used from a dedicated thread executor,
+so the event loop never waits on disk. Lookups by id, status, job_id,
+deadline and created_at are served by indexes.
+"""
+
+import asyncio
+import base64
+import functools
+import json
+import os
+import queue
+import sqlite3
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import analytics
+import job_ranking
+import search
+
+DEFAULT_DB_PATH = str(Path(__file__).parent / "jobtracker.db")
+
+JOB_FIELDS = [
+    "company",
+    "position",
+    "salary",
+    "location",
+    "status",
+    "priority",
+    "application_date",
+    "deadline",
+    "job_url",
+    "notes",
+    "description",
+]
+CONTACT_FIELDS = ["job_id", "name", "email", "role", "notes"]
+PROFILE_FIELDS = [
+    "name",
+    "email",
+    "mobile_number",
+    "skills",
+    "total_experience",
+    "education",
+]
+DATETIME_FIELDS = {"application_date", "deadline", "created_at", "updated_at"}
+JSON_FIELDS = {"skills", "education"}
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    """
+    CREATE TABLE jobs (
+        id TEXT PRIMARY KEY,
+        company TEXT NOT NULL,
+        position TEXT NOT NULL,
+        salary TEXT,
+        location TEXT,
+        status TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        application_date TEXT,
+        deadline TEXT,
+        job_url TEXT,
+        notes TEXT,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE INDEX idx_jobs_status ON jobs (status);
+    CREATE INDEX idx_jobs_deadline ON jobs (deadline);
+    CREATE INDEX idx_jobs_created_at ON jobs (created_at);
+
+    CREATE TABLE contacts (
+        id TEXT PRIMARY KEY,
+        job_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        email TEXT,
+        role TEXT,
+        notes TEXT
+    );
+    CREATE INDEX idx_contacts_job_id ON contacts (job_id);
+
+    CREATE TABLE user_profiles (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL,
+        mobile_number TEXT,
+        skills TEXT NOT NULL DEFAULT '[]',
+        total_experience REAL NOT NULL DEFAULT 0,
+        education TEXT NOT NULL DEFAULT '[]',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    """,
+    # Keyset pagination: every sort order is backed by a (key, id) index
+    """
+    ALTER TABLE jobs ADD COLUMN priority_rank INTEGER NOT NULL DEFAULT 1;
+    UPDATE jobs SET priority_rank = CASE priority
+        WHEN 'low' THEN 0 WHEN 'high' THEN 2 ELSE 1 END;
+    DROP INDEX idx_jobs_created_at;
+    CREATE INDEX idx_jobs_created_at_id ON jobs (created_at, id);
+    CREATE INDEX idx_jobs_priority_id ON jobs (priority_rank, id);
+    CREATE INDEX idx_jobs_deadline_id ON jobs (
+        IFNULL(deadline, '9999-12-31T23:59:59.999999+00:00'), id
+    );
+    CREATE INDEX idx_jobs_status_created_at_id ON jobs (status, created_at, id);
+    CREATE INDEX idx_jobs_location ON jobs (location COLLATE NOCASE);
+
+    ALTER TABLE contacts ADD COLUMN created_at TEXT NOT NULL DEFAULT '';
+    UPDATE contacts SET created_at = strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now');
+    CREATE INDEX idx_contacts_created_at_id ON contacts (created_at, id);
+    CREATE INDEX idx_contacts_job_id_created_at_id ON contacts (job_id, created_at, id);
+    """,
+    # Materialized analytics, backfilled from existing jobs
+    analytics.MIGRATION
+    + """
+    INSERT INTO analytics_counters (name, value)
+        SELECT 'status:' || status, COUNT(*) FROM jobs GROUP BY status;
+    INSERT INTO analytics_daily (day, applications)
+        SELECT substr(IFNULL(application_date, created_at), 1, 10), COUNT(*)
+        FROM jobs WHERE status != 'saved' GROUP BY 1;
+    """,
+    # Append-only status transition log, seeded with each job's current status
+    """
+    CREATE TABLE job_events (
+        id INTEGER PRIMARY KEY,
+        job_id TEXT NOT NULL,
+        from_status TEXT,
+        to_status TEXT NOT NULL,
+        occurred_at TEXT NOT NULL
+    );
+    CREATE INDEX idx_job_events_job_id_id ON job_events (job_id, id);
+    CREATE INDEX idx_job_events_occurred_at ON job_events (occurred_at);
+    CREATE TRIGGER job_events_no_update BEFORE UPDATE ON job_events
+        BEGIN SELECT RAISE(ABORT, 'job_events is append-only'); END;
+    CREATE TRIGGER job_events_no_delete BEFORE DELETE ON job_events
+        BEGIN SELECT RAISE(ABORT, 'job_events is append-only'); END;
+    INSERT INTO job_events (job_id, from_status, to_status, occurred_at)
+        SELECT id, NULL, status, created_at FROM jobs ORDER BY created_at, id;
+    """,
+    # Duplicate detection for bulk imports
+    """
+    CREATE INDEX idx_jobs_job_url ON jobs (job_url);
+    CREATE INDEX idx_jobs_company_position ON jobs (lower(company), lower(position));
+    """,
+    # Per-table version numbers for ETags and response caching
+    """
+    CREATE TABLE collection_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    INSERT INTO collection_versions (name, version)
+        VALUES ('jobs', 0), ('contacts', 0), ('user_profiles', 0);
+    """,
+    # Job descriptions and per-job skill vectors for ranking
+    job_ranking.MIGRATION,
+    # Full-text search indexes, maintained by triggers
+    search.MIGRATION,
+]
+
+PRIORITY_RANKS = {"low": 0, "medium": 1, "high": 2}
+
+# Sort key expressions; each matches an index in MIGRATIONS exactly
+JOB_SORT_KEYS = {
+    "created_at": "created_at",
+    "deadline": "IFNULL(deadline, '9999-12-31T23:59:59.999999+00:00')",
+    "priority": "priority_rank",
+}
+CONTACT_SORT_KEYS = {"created_at": "created_at"}
+
+# Columns the API models do not expose
+INTERNAL_COLUMNS = {"priority_rank", "sort_key"}
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def to_db_value(field: str, value):
+    """Convert a model value to its column representation"""
+    if value is None:
+        return None
+    if field in DATETIME_FIELDS:
+        if isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        # Fixed-width UTC timestamps so text order is chronological order
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+    if field in JSON_FIELDS:
+        return json.dumps(value)
+    if hasattr(value, "value"):  # Enum members
+        return value.value
+    return value
+
+
+def row_to_dict(row: sqlite3.Row) -> Dict:
+    """Convert a database row back into model-shaped data"""
+    data = {key: row[key] for key in row.keys() if key not in INTERNAL_COLUMNS}
+    for field in JSON_FIELDS & data.keys():
+        data[field] = json.loads(data[field]) if data[field] else []
+    return data
+
+
+def encode_cursor(sort: str, sort_key, row_id: str) -> str:
+    """Opaque keyset cursor pointing just after the given row"""
+    raw = json.dumps([sort, sort_key, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    """Decode a cursor from encode_cursor; ValueError if invalid or mismatched"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, sort_key, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor was issued for a different sort order")
+    return sort_key, row_id
+
+
+class Storage:
+    """SQLite (WAL) storage with a connection pool used from worker threads"""
+
+    def __init__(self, path: Optional[str] = None, pool_size: Optional[int] = None):
+        self.path = path or os.getenv("DATABASE_PATH", DEFAULT_DB_PATH)
+        self.pool_size = pool_size or int(os.getenv("DATABASE_POOL_SIZE", "4"))
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._connections: List[sqlite3.Connection] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def open(self):
+        """Open the connection pool and bring the schema up to date"""
+        if self._executor is not None:
+            return
+        for _ in range(self.pool_size):
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._connections.append(conn)
+            self._pool.put(conn)
+        self._migrate(self._connections[0])
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.pool_size, thread_name_prefix="storage"
+        )
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+        self._pool = queue.Queue()
+
+    def _migrate(self, conn: sqlite3.Connection):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            with conn:
+                conn.executescript(script)
+                conn.execute(f"PRAGMA user_version = {number}")
+
+    def _with_connection(self, fn, *args):
+        conn = self._pool.get()
+        try:
+            with conn:  # one transaction per call
+                return fn(conn, *args)
+        finally:
+            self._pool.put(conn)
+
+    async def run(self, fn, *args):
+        """Run fn(conn, *args) in a single transaction on a pool thread"""
+        if self._executor is None:
+            self.open()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(self._with_connection, fn, *args)
+        )
+
+    async def backfill_job_vectors(self) -> int:
+        """Vectorize jobs missing a vector for the current skill taxonomy"""
+        return await self.run(job_ranking.backfill_job_vectors)
+
+    # Jobs
+
+    async def create_job(self, data: Dict) -> Dict:
+        return await self.run(_insert_job, data)
+
+    async def get_job(self, job_id: str) -> Optional[Dict]:
+        return await self.run(_get, "jobs", job_id)
+
+    async def list_jobs(
+        self,
+        filters: Optional[Dict] = None,
+        sort: str = "created_at",
+        descending: bool = False,
+        limit: int = 100,
+        after: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of jobs plus the cursor for the next page (None at the end)"""
+        return await self.run(
+            _list_page, "jobs", JOB_SORT_KEYS, _job_filters(filters or {}),
+            sort, descending, limit, after,
+        )
+
+    async def update_job(self, job_id: str, data: Dict) -> Optional[Dict]:
+        return await self.run(_update_job, job_id, data)
+
+    async def delete_job(self, job_id: str) -> bool:
+        return await self.run(_delete_job, job_id)
+
+    async def import_jobs(self, rows: List[Dict]) -> List[Tuple[Optional[str], Optional[str]]]:
+        """
+        Insert a batch of jobs in one transaction, skipping duplicates.
+        Returns (new id, None) or (None, id of the existing job) per row.
+        """
+        return await self.run(_import_jobs, rows)
+
+    async def get_jobs_by_id(self, job_ids: List[str]) -> Dict[str, Dict]:
+        return await self.run(_get_many, "jobs", job_ids)
+
+    async def search(self, text: str, types=search.DOCUMENT_TYPES, limit: int = 20) -> List[Dict]:
+        return await self.run(search.search, text, types, limit)
+
+    async def list_job_events(self, job_id: str) -> List[Dict]:
+        """Status transitions of a job, oldest first"""
+        return await self.run(_list_job_events, job_id)
+
+    # Analytics
+
+    async def get_analytics(self) -> Dict:
+        return await self.run(analytics.read_analytics)
+
+    async def rebuild_analytics(self, write: bool = True) -> Dict:
+        """Recompute the analytics tables; returns the drift (see analytics.py)"""
+        return await self.run(_rebuild_analytics, write)
+
+    # Contacts
+
+    async def create_contact(self, data: Dict) -> Dict:
+        return await self.run(_insert, "contacts", CONTACT_FIELDS, data, "created")
+
+    async def list_contacts(
+        self,
+        job_ids: Optional[List[str]] = None,
+        descending: bool = False,
+        limit: int = 100,
+        after: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of contacts plus the cursor for the next page"""
+        where = []
+        if job_ids:
+            where.append(_in_clause("job_id", job_ids))
+        return await self.run(
+            _list_page, "contacts", CONTACT_SORT_KEYS, where,
+            "created_at", descending, limit, after,
+        )
+
+    async def collection_versions(self, names) -> Dict[str, int]:
+        """Current version of each collection (table); bumped by every write"""
+        return await self.run(_collection_versions, list(names))
+
+    # User profiles
+
+    async def create_profile(self, data: Dict) -> Dict:
+        return await self.run(_insert, "user_profiles", PROFILE_FIELDS, data, True)
+
+    async def get_profile(self, profile_id: str) -> Optional[Dict]:
+        return await self.run(_get, "user_profiles", profile_id)
+
+    async def update_profile(self, profile_id: str, data: Dict) -> Optional[Dict]:
+        return await self.run(
+            _update, "user_profiles", PROFILE_FIELDS, profile_id, data, True
+        )
+
+
+def _job_extras(data: Dict) -> Dict:
+    """Add derived job columns (used for sorting) to model data"""
+    priority = to_db_value("priority", data.get("priority")) or "medium"
+    return {**data, "priority_rank": PRIORITY_RANKS.get(priority, 1)}
+
+
+def _insert_job(conn, data: Dict) -> Dict:
+    job = _insert(conn, "jobs", JOB_FIELDS, _job_extras(data), True)
+    analytics.record_job_change(conn, None, job)
+    _record_event(conn, job["id"], None, job["status"], job["created_at"])
+    job_ranking.record_job_vector(conn, job["id"], job)
+    return job
+
+
+def _update_job(conn, job_id: str, data: Dict) -> Optional[Dict]:
+    old = _get(conn, "jobs", job_id)
+    if old is None:
+        return None
+    job = _update(conn, "jobs", JOB_FIELDS, job_id, _job_extras(data), True)
+    analytics.record_job_change(conn, old, job)
+    if job["status"] != old["status"]:
+        _record_event(conn, job_id, old["status"], job["status"], job["updated_at"])
+    job_ranking.record_job_vector(conn, job_id, job)
+    return job
+
+
+def _delete_job(conn, job_id: str) -> bool:
+    old = _get(conn, "jobs", job_id)
+    if old is None:
+        return False
+    _delete(conn, "jobs", job_id)
+    analytics.record_job_change(conn, old, None)
+    _record_event(
+        conn, job_id, old["status"], "deleted", to_db_value("updated_at", utc_now())
+    )
+    job_ranking.record_job_vector(conn, job_id, None)
+    return True
+
+
+def _import_jobs(conn, rows: List[Dict]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Rows with a job_url are duplicates of a job with the same URL; rows
+    without one of a job with the same company and position (ignoring case).
+    """
+    urls = list({row["job_url"].strip() for row in rows if row.get("job_url")})
+    pairs = list({(row["company"], row["position"]) for row in rows if not row.get("job_url")})
+
+    seen_urls: Dict[str, str] = {}
+    if urls:
+        clause, params = _in_clause("job_url", urls)
+        for row in conn.execute(f"SELECT id, job_url FROM jobs WHERE {clause}", params):
+            seen_urls[row["job_url"]] = row["id"]
+    seen_pairs: Dict[Tuple[str, str], str] = {}
+    if pairs:
+        values = ", ".join("(lower(?), lower(?))" for _ in pairs)
+        for row in conn.execute(
+            "SELECT id, company, position FROM jobs "
+            f"WHERE (lower(company), lower(position)) IN (VALUES {values})",
+            [value for pair in pairs for value in pair],
+        ):
+            seen_pairs[(row["company"].lower(), row["position"].lower())] = row["id"]
+
+    results = []
+    for row in rows:
+        url = (row.get("job_url") or "").strip()
+        if url:
+            duplicate_of = seen_urls.get(url)
+        else:
+            key = (row["company"].lower(), row["position"].lower())
+            duplicate_of = seen_pairs.get(key)
+        if duplicate_of:
+            results.append((None, duplicate_of))
+            continue
+        job = _insert_job(conn, {**row, "job_url": url or None})
+        if url:
+            seen_urls[url] = job["id"]
+        else:
+            seen_pairs[key] = job["id"]
+        results.append((job["id"], None))
+    return results
+
+
+def _record_event(conn, job_id: str, from_status, to_status: str, occurred_at: str):
+    conn.execute(
+        "INSERT INTO job_events (job_id, from_status, to_status, occurred_at) "
+        "VALUES (?, ?, ?, ?)",
+        (job_id, from_status, to_status, occurred_at),
+    )
+
+
+def _list_job_events(conn, job_id: str) -> List[Dict]:
+    rows = conn.execute(
+        "SELECT * FROM job_events WHERE job_id = ? ORDER BY id", (job_id,)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _insert(conn, table: str, fields: List[str], data: Dict, timestamps) -> Dict:
+    """
+    Insert a row with a server-generated id. timestamps=True sets created_at
+    and updated_at, "created" only created_at.
+    """
+    row = {field: to_db_value(field, data.get(field)) for field in fields}
+    if "priority_rank" in data:
+        row["priority_rank"] = data["priority_rank"]
+    row["id"] = uuid.uuid4().hex
+    if timestamps:
+        row["created_at"] = to_db_value("created_at", utc_now())
+    if timestamps is True:
+        row["updated_at"] = row["created_at"]
+    columns = ", ".join(row)
+    placeholders = ", ".join("?" for _ in row)
+    conn.execute(
+        f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", list(row.values())
+    )
+    _bump_version(conn, table)
+    return _get(conn, table, row["id"])
+
+
+def _get(conn, table: str, row_id: str) -> Optional[Dict]:
+    row = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    return row_to_dict(row) if row else None
+
+
+def _get_many(conn, table: str, row_ids: List[str]) -> Dict[str, Dict]:
+    if not row_ids:
+        return {}
+    clause, params = _in_clause("id", row_ids)
+    rows = conn.execute(f"SELECT * FROM {table} WHERE {clause}", params).fetchall()
+    return {row["id"]: row_to_dict(row) for row in rows}
+
+
+def _update(
+    conn, table: str, fields: List[str], row_id: str, data: Dict, timestamps: bool
+) -> Optional[Dict]:
+    """Replace a row's fields; id and created_at are kept. None if missing."""
+    row = {field: to_db_value(field, data.get(field)) for field in fields}
+    if "priority_rank" in data:
+        row["priority_rank"] = data["priority_rank"]
+    if timestamps:
+        row["updated_at"] = to_db_value("updated_at", utc_now())
+    assignments = ", ".join(f"{column} = ?" for column in row)
+    cursor = conn.execute(
+        f"UPDATE {table} SET {assignments} WHERE id = ?", [*row.values(), row_id]
+    )
+    if cursor.rowcount == 0:
+        return None
+    _bump_version(conn, table)
+    return _get(conn, table, row_id)
+
+
+def _delete(conn, table: str, row_id: str) -> bool:
+    cursor = conn.execute(f"DELETE FROM {table} WHERE id = ?", (row_id,))
+    if cursor.rowcount == 0:
+        return False
+    _bump_version(conn, table)
+    return True
+
+
+def _rebuild_analytics(conn, write: bool) -> Dict:
+    drift = analytics.rebuild_analytics(conn, write)
+    if write and drift:
+        # Cached /api/analytics responses (and their ETags) follow the jobs version
+        _bump_version(conn, "jobs")
+    return drift
+
+
+def _bump_version(conn, table: str):
+    conn.execute(
+        "INSERT INTO collection_versions (name, version) VALUES (?, 1) "
+        "ON CONFLICT (name) DO UPDATE SET version = version + 1",
+        (table,),
+    )
+
+
+def _collection_versions(conn, names: List[str]) -> Dict[str, int]:
+    clause, params = _in_clause("name", names)
+    versions = dict.fromkeys(names, 0)
+    for row in conn.execute(
+        f"SELECT name, version FROM collection_versions WHERE {clause}", params
+    ):
+        versions[row["name"]] = row["version"]
+    return versions
+
+
+def _in_clause(column: str, values: List) -> Tuple[str, List]:
+    placeholders = ", ".join("?" for _ in values)
+    return f"{column} IN ({placeholders})", list(values)
+
+
+def _job_filters(filters: Dict) -> List[Tuple[str, List]]:
+    """Translate API filters into indexed WHERE clauses"""
+    where = []
+    if filters.get("status"):
+        where.append(_in_clause("status", [to_db_value("status", s) for s in filters["status"]]))
+    if filters.get("priority"):
+        ranks = [PRIORITY_RANKS[to_db_value("priority", p)] for p in filters["priority"]]
+        where.append(_in_clause("priority_rank", ranks))
+    if filters.get("location"):
+        # Case-insensitive prefix match served by the NOCASE index
+        escaped = filters["location"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where.append(("location LIKE ? ESCAPE '\\'", [escaped + "%"]))
+    for field, column in (("created", "created_at"), ("deadline", "deadline")):
+        if filters.get(f"{field}_after"):
+            where.append((f"{column} >= ?", [to_db_value(column, filters[f"{field}_after"])]))
+        if filters.get(f"{field}_before"):
+            where.append((f"{column} < ?", [to_db_value(column, filters[f"{field}_before"])]))
+    return where
+
+
+def _list_page(
+    conn,
+    table: str,
+    sort_keys: Dict[str, str],
+    where: List[Tuple[str, List]],
+    sort: str,
+    descending: bool,
+    limit: int,
+    after: Optional[str],
+) -> Tuple[List[Dict], Optional[str]]:
+    """Keyset-paginated listing: WHERE (key, id) > cursor ORDER BY key, id"""
+    key = sort_keys[sort]
+    clauses = [clause for clause, _ in where]
+    params = [param for _, values in where for param in values]
+    if after:
+        sort_key, row_id = decode_cursor(after, f"{sort}:{'desc' if descending else 'asc'}")
+        clauses.append(f"({key}, id) {'<' if descending else '>'} (?, ?)")
+        params.extend([sort_key, row_id])
+
+    direction = "DESC" if descending else "ASC"
+    sql = f"SELECT *, {key} AS sort_key FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {key} {direction}, id {direction} LIMIT ?"
+    rows = conn.execute(sql, [*params, limit + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            f"{sort}:{'desc' if descending else 'asc'}", last["sort_key"], last["id"]
+        )
+    return [row_to_dict(row) for row in rows], next_cursor
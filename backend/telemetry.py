@@ -0,0 +1,182 @@
+"""
+Logging, counters, latency histograms and timing spans.
+
+Log calls go through the standard logging module with lazy %-formatting,
+so a disabled level costs one level check and never formats its
+arguments. LOG_LEVEL sets the level (default INFO).
+
+Metrics live in an in-process registry and are rendered in the Prometheus
+text format by GET /metrics. CV parsing runs in worker processes, so
+parse_engine wraps each parse in capture(): metric updates made by the
+worker are collected instead of applied, returned with the result and
+replayed into the API process's registry.
+"""
+
+import logging
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Seconds; the upper bounds of the histogram buckets
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+log = logging.getLogger("jobtracker")
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(LOG_LEVEL)
+    log.propagate = False
+
+_lock = threading.Lock()
+_local = threading.local()
+_metrics: Dict[str, "_Metric"] = {}
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        _metrics[name] = self
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def _record(self, value: float, labels: Dict[str, str]):
+        captured = getattr(_local, "captured", None)
+        if captured is not None:
+            captured.append((self.name, value, labels))
+        else:
+            with _lock:
+                self._apply(self._key(labels), value)
+
+    def _apply(self, key: Tuple[str, ...], value: float):
+        raise NotImplementedError
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str):
+        self._record(amount, labels)
+
+    def _apply(self, key, value):
+        self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{self._label_text(key)} {_number(value)}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels: str):
+        self._record(value, labels)
+
+    def _apply(self, key, value):
+        state = self._values.get(key)
+        if state is None:
+            # per-bucket counts (plus +Inf), sum
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                labels = self._label_text(key, 'le="' + le + '"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{self._label_text(key)} {_number(total)}"
+            yield f"{self.name}_count{self._label_text(key)} {cumulative}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+STAGE_SECONDS = Histogram(
+    "cv_stage_seconds", "Time spent in each stage of handling a CV", ["stage"]
+)
+CV_PARSES = Counter("cv_parses_total", "CVs parsed, by parser and outcome", ["parser", "result"])
+CV_FALLBACKS = Counter(
+    "cv_parser_fallbacks_total", "Parses handed to SimpleCVParser by the advanced parser", ["reason"]
+)
+CV_CACHE = Counter("cv_cache_lookups_total", "Parsed CV cache lookups", ["result"])
+CV_REJECTED = Counter("cv_uploads_rejected_total", "CV uploads rejected before parsing", ["status"])
+
+
+class span:
+    """Time a block into cv_stage_seconds{stage=...}"""
+
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        STAGE_SECONDS.observe(perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+@contextmanager
+def capture() -> Iterator[List[Tuple[str, float, Dict[str, str]]]]:
+    """Collect this thread's metric updates instead of applying them"""
+    previous = getattr(_local, "captured", None)
+    _local.captured = captured = []
+    try:
+        yield captured
+    finally:
+        _local.captured = previous
+
+
+def replay(updates: Optional[List[Tuple[str, float, Dict[str, str]]]]):
+    """Apply updates collected by capture(), e.g. in a worker process"""
+    if not updates:
+        return
+    with _lock:
+        for name, value, labels in updates:
+            metric = _metrics.get(name)
+            if metric is not None:
+                metric._apply(metric._key(labels), value)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for metric in _metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
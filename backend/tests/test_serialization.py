@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_PATH", os.path.join(tempfile.mkdtemp(), "jobs.db"))
+os.environ.setdefault("CV_PARSER_WORKERS", "0")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+def test_read_endpoints_serialize_jobs_like_writes():
+    job = {
+        "company": "Acme",
+        "position": "Engineer",
+        "status": "applied",
+        "deadline": "2030-01-31T00:00:00Z",
+    }
+    with TestClient(main.app) as client:
+        created = client.post("/api/jobs", json=job)
+        assert created.status_code == 200
+        job_id = created.json()["id"]
+        fetched = client.get(f"/api/jobs/{job_id}")
+        assert fetched.json() == created.json()
+
+        updated = client.put(f"/api/jobs/{job_id}", json={**job, "position": "Lead"})
+        listed = client.get("/api/jobs").json()
+        assert [row for row in listed if row["id"] == job_id] == [updated.json()]
@@ -0,0 +1,290 @@
+"""
+Time-series analytics over the job status event log.
+
+Every job write appends to job_events (see storage.py). The charts are
+computed from that log in batch with NumPy: the events of the jobs active
+in the requested window are loaded as columns, each job's milestones
+(first application, response, interview, offer) are found with vectorized
+group-by-first operations, and those are then binned into day, week or
+month buckets.
+
+Deleted jobs are left out, as they are from /api/analytics. The two still
+bin applications differently on purpose: these charts use when each
+status change was recorded, so they show activity as it happened, while
+the dashboard's week/month counts use the job's (editable)
+application_date. A job entered today with last month's application_date
+is one of this month's trends applications and one of last month's
+dashboard applications.
+
+Results are cached per bucket. Each query first reads the events appended
+since the last one and drops only the buckets they can change: the bucket
+the event falls into and the bucket the job's application falls into.
+"""
+
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+BUCKET_SIZES = ("day", "week", "month")
+
+STATUS_CODES = {
+    "saved": 0,
+    "applied": 1,
+    "interview": 2,
+    "offer": 3,
+    "rejected": 4,
+    "deleted": 5,
+}
+# Milestone -> statuses whose first occurrence marks it
+MILESTONES = {
+    "applied": ("applied", "interview", "offer", "rejected"),
+    "response": ("interview", "offer", "rejected"),
+    "interview": ("interview", "offer"),
+    "offer": ("offer",),
+    "rejected": ("rejected",),
+}
+PERCENTILES = (50, 75, 90)
+
+_DAY = np.timedelta64(1, "D")
+
+
+def bucket_start(day: date, size: str) -> date:
+    if size == "week":
+        return day - timedelta(days=day.weekday())
+    if size == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, size: str) -> date:
+    if size == "week":
+        return start + timedelta(days=7)
+    if size == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_label(start: date, size: str) -> str:
+    """2026-10-18 (day), 2026-10-12 (week starting Monday) or 2026-10 (month)"""
+    return start.strftime("%Y-%m") if size == "month" else start.isoformat()
+
+
+def bucket_range(size: str, periods: int, end: Optional[date] = None) -> List[date]:
+    """Start dates of the last `periods` buckets up to and including end"""
+    start = bucket_start(end or datetime.now(timezone.utc).date(), size)
+    starts = [start]
+    for _ in range(periods - 1):
+        start = bucket_start(start - timedelta(days=1), size)
+        starts.append(start)
+    return starts[::-1]
+
+
+def _first_per_job(job: np.ndarray, mask: np.ndarray, n_jobs: int) -> np.ndarray:
+    """
+    Index of each job's first event matching mask (-1 if none). Events must
+    be sorted by job, then by append order.
+    """
+    first = np.full(n_jobs, -1, dtype=np.int64)
+    (matching,) = np.nonzero(mask)
+    jobs, offsets = np.unique(job[matching], return_index=True)
+    first[jobs] = matching[offsets]
+    return first
+
+
+def _bin(times: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Bucket index of each time given sorted bucket edges; -1 outside"""
+    index = np.searchsorted(edges, times, side="right") - 1
+    index[(index >= len(edges) - 1) | np.isnat(times)] = -1
+    return index
+
+
+class TimeseriesAnalytics:
+    """Per-bucket cache of trends, funnels and time-to-response statistics"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._rows: Dict[Tuple[str, date], Dict] = {}
+        self._watermark: Optional[int] = None
+        self._lock = threading.Lock()
+
+    async def series(
+        self, metric: str, size: str, periods: int, end: Optional[date] = None
+    ) -> List[Dict]:
+        """One row per bucket of the given metric, oldest first"""
+        starts = bucket_range(size, periods, end)
+        rows = await self.storage.run(self._rows_for, size, starts)
+        return [{"bucket": bucket_label(start, size), **row[metric]} for start, row in zip(starts, rows)]
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._watermark = None
+
+    def _rows_for(self, conn, size: str, starts: List[date]) -> List[Dict]:
+        # Serialized so a bucket is never cached from data older than an
+        # invalidation another query has already applied
+        with self._lock:
+            watermark = self._invalidate(conn)
+            missing = [start for start in starts if (size, start) not in self._rows]
+            if missing:
+                self._compute(conn, size, missing, watermark)
+            return [self._rows[(size, start)] for start in starts]
+
+    def _invalidate(self, conn) -> int:
+        """Drop cached buckets the events appended since the last query touch"""
+        latest = conn.execute("SELECT IFNULL(MAX(id), 0) FROM job_events").fetchone()[0]
+        if self._watermark is None:
+            self._rows.clear()
+        elif latest > self._watermark and self._rows:
+            days = set()
+            job_ids = set()
+            deleted = set()
+            for job_id, to_status, occurred_at in conn.execute(
+                "SELECT job_id, to_status, occurred_at FROM job_events WHERE id > ? AND id <= ?",
+                (self._watermark, latest),
+            ):
+                days.add(date.fromisoformat(occurred_at[:10]))
+                job_ids.add(job_id)
+                if to_status == "deleted":
+                    deleted.add(job_id)
+            # A deleted job drops out of every bucket it was counted in
+            for job_id in deleted:
+                for (occurred_at,) in conn.execute(
+                    "SELECT occurred_at FROM job_events WHERE job_id = ? AND id <= ?",
+                    (job_id, latest),
+                ):
+                    days.add(date.fromisoformat(occurred_at[:10]))
+            # A late response or interview changes the application's cohort
+            placeholders = ", ".join("?" for _ in MILESTONES["applied"])
+            for job_id in job_ids:
+                applied_at = conn.execute(
+                    f"SELECT MIN(occurred_at) FROM job_events WHERE job_id = ? "
+                    f"AND to_status IN ({placeholders}) AND id <= ?",
+                    (job_id, *MILESTONES["applied"], latest),
+                ).fetchone()[0]
+                if applied_at:
+                    days.add(date.fromisoformat(applied_at[:10]))
+            for day in days:
+                for size in BUCKET_SIZES:
+                    self._rows.pop((size, bucket_start(day, size)), None)
+        self._watermark = latest
+        return latest
+
+    def _load(self, conn, since: date, until: date, watermark: int):
+        """Columns of every event of the live jobs with any event in [since, until)"""
+        rows = conn.execute(
+            """
+            SELECT job_id, to_status, substr(occurred_at, 1, 26) FROM job_events
+            WHERE id <= ? AND job_id IN (
+                SELECT job_id FROM job_events
+                WHERE occurred_at >= ? AND occurred_at < ? AND id <= ?
+            ) AND job_id IN (SELECT id FROM jobs)
+            ORDER BY job_id, id
+            """,
+            (watermark, since.isoformat(), until.isoformat(), watermark),
+        ).fetchall()
+        if not rows:
+            return None
+        job_ids, statuses, times = zip(*rows)
+        _, job = np.unique(np.array(job_ids), return_inverse=True)
+        status = np.array([STATUS_CODES.get(s, -1) for s in statuses], dtype=np.int8)
+        return job, status, np.array(times, dtype="datetime64[us]")
+
+    def _compute(self, conn, size: str, starts: List[date], watermark: int):
+        starts = sorted(starts)
+        ends = [next_bucket(start, size) for start in starts]
+        n = len(starts)
+        # Requested buckets need not be contiguous: bin over the full span
+        # and keep only the requested ones
+        span = [starts[0]]
+        while span[-1] < ends[-1]:
+            span.append(next_bucket(span[-1], size))
+        keep = np.array([span.index(start) for start in starts])
+        edges = np.array(span, dtype="datetime64[D]")
+        n_span = len(span) - 1
+
+        counts = {name: np.zeros(n_span, dtype=np.int64) for name in MILESTONES}
+        cohort = {name: np.zeros(n_span, dtype=np.int64) for name in MILESTONES}
+        delays: List[np.ndarray] = [np.empty(0)] * n_span
+
+        columns = self._load(conn, starts[0], ends[-1], watermark)
+        if columns is not None:
+            job, status, times = columns
+            n_jobs = int(job.max()) + 1
+            firsts = {}
+            for name, statuses in MILESTONES.items():
+                codes = [STATUS_CODES[s] for s in statuses]
+                first = _first_per_job(job, np.isin(status, codes), n_jobs)
+                firsts[name] = first
+                milestone_times = np.where(first >= 0, times[first], np.datetime64("NaT"))
+                # Trends: milestones binned by when they happened
+                index = _bin(milestone_times, edges)
+                counts[name] = np.bincount(index[index >= 0], minlength=n_span)
+                if name == "applied":
+                    applied_index = index
+
+            # Funnel: jobs binned by when they applied, counted by how far
+            # they got since
+            in_cohort = applied_index >= 0
+            for name, first in firsts.items():
+                reached = in_cohort & (first >= 0)
+                cohort[name] = np.bincount(applied_index[reached], minlength=n_span)
+
+            # Time to response for responses that came after the application
+            applied, responded = firsts["applied"], firsts["response"]
+            answered = in_cohort & (responded > applied)
+            days = (times[responded[answered]] - times[applied[answered]]) / _DAY
+            buckets = applied_index[answered]
+            order = np.argsort(buckets, kind="stable")
+            splits = np.cumsum(np.bincount(buckets, minlength=n_span))[:-1]
+            delays = np.split(days[order], splits)
+
+        for i, start in zip(keep, starts):
+            self._rows[(size, start)] = {
+                "trends": {
+                    "applications": int(counts["applied"][i]),
+                    "responses": int(counts["response"][i]),
+                    "interviews": int(counts["interview"][i]),
+                    "offers": int(counts["offer"][i]),
+                    "rejections": int(counts["rejected"][i]),
+                },
+                "funnel": _funnel_row({name: int(cohort[name][i]) for name in MILESTONES}),
+                "time_to_response": _delay_row(delays[i]),
+            }
+
+
+def _rate(part: int, whole: int) -> float:
+    return round(100.0 * part / whole, 1) if whole else 0.0
+
+
+def _funnel_row(reached: Dict[str, int]) -> Dict:
+    applied = reached["applied"]
+    return {
+        "applied": applied,
+        "responded": reached["response"],
+        "interviewed": reached["interview"],
+        "offered": reached["offer"],
+        "rejected": reached["rejected"],
+        "response_rate": _rate(reached["response"], applied),
+        "interview_rate": _rate(reached["interview"], applied),
+        "offer_rate": _rate(reached["offer"], applied),
+    }
+
+
+def _delay_row(days: np.ndarray) -> Dict:
+    row = {"responses": int(days.size), "mean_days": None}
+    row.update({f"p{p}_days": None for p in PERCENTILES})
+    if days.size:
+        row["mean_days"] = round(float(days.mean()), 2)
+        for p, value in zip(PERCENTILES, np.percentile(days, PERCENTILES)):
+            row[f"p{p}_days"] = round(float(value), 2)
+    return row
+
+
+def funnel_totals(rows: List[Dict]) -> Dict:
+    """Sum per-bucket funnel rows (cohorts are disjoint) into one funnel"""
+    keys = ("applied", "response", "interview", "offer", "rejected")
+    fields = ("applied", "responded", "interviewed", "offered", "rejected")
+    return _funnel_row({key: sum(row[field] for row in rows) for key, field in zip(keys, fields)})
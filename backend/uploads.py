@@ -0,0 +1,311 @@
+"""
+Bounded-memory handling of uploaded CV files.
+
+Uploads are read in fixed-size chunks, hashed as they arrive and rejected
+with 413 as soon as they cross the size cap. Small files stay in memory;
+larger ones spill to a temp file on disk (CV_SPOOL_DIR) so peak memory
+per upload is bounded by the chunk size.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from time import perf_counter
+from typing import BinaryIO, Dict, List, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from docx_extract import SNIFF_BYTES, UnsupportedDocument, check_format
+from telemetry import CV_REJECTED, STAGE_SECONDS, span
+
+MAX_UPLOAD_BYTES = int(os.getenv("CV_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+SPOOL_THRESHOLD = int(os.getenv("CV_SPOOL_THRESHOLD", str(1024 * 1024)))
+# Disk-backed on purpose: spilling to tmpfs would put large uploads back in RAM
+SPOOL_DIR = os.getenv("CV_SPOOL_DIR") or None
+BATCH_MAX_BYTES = int(os.getenv("CV_BATCH_MAX_BYTES", str(256 * 1024 * 1024)))
+BATCH_MAX_FILES = int(os.getenv("CV_BATCH_MAX_FILES", "500"))
+CHUNK_SIZE = 64 * 1024
+
+CV_EXTENSIONS = (".pdf", ".doc", ".docx")
+
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class SpooledUpload:
+    """Upload content held in memory up to a threshold, then spilled to disk"""
+
+    def __init__(self, filename: str, spool_threshold: int = SPOOL_THRESHOLD):
+        self.filename = filename
+        self.spool_threshold = spool_threshold
+        self.size = 0
+        self.head = b""  # first bytes, to check the format against the name
+        self.path: Optional[str] = None
+        self.spool_seconds = 0.0  # time spent writing the spill file
+        self._hash = hashlib.sha256()
+        self._buffer = bytearray()
+        self._file = None
+        self._stream: Optional[BinaryIO] = None  # a file spooled elsewhere, see adopt_upload()
+        self._stream_hashed = False
+
+    @classmethod
+    def from_stream(cls, filename: str, stream: BinaryIO) -> "SpooledUpload":
+        """Wrap an already spooled, seekable file without copying it"""
+        upload = cls(filename)
+        upload.size = stream.seek(0, os.SEEK_END)
+        stream.seek(0)
+        upload.head = stream.read(SNIFF_BYTES)
+        upload._stream = stream
+        return upload
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 hex digest of everything written so far"""
+        if self._stream is not None and not self._stream_hashed:
+            self._stream.seek(0)
+            for chunk in iter(lambda: self._stream.read(CHUNK_SIZE), b""):
+                self._hash.update(chunk)
+            self._stream_hashed = True
+        return self._hash.hexdigest()
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        self._hash.update(chunk)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[:SNIFF_BYTES - len(self.head)]
+        if self._file is None and self.size > self.spool_threshold:
+            self._file = tempfile.NamedTemporaryFile(
+                delete=False, suffix=Path(self.filename).suffix, dir=SPOOL_DIR
+            )
+            self.path = self._file.name
+            self._file.write(self._buffer)
+            self._buffer = bytearray()
+        if self._file is not None:
+            start = perf_counter()
+            self._file.write(chunk)
+            self.spool_seconds += perf_counter() - start
+        else:
+            self._buffer += chunk
+
+    def finish(self):
+        """Flush the spill file so other processes can read it"""
+        if self._file is not None:
+            start = perf_counter()
+            self._file.close()
+            self.spool_seconds += perf_counter() - start
+            STAGE_SECONDS.observe(self.spool_seconds, stage="temp_file_write")
+
+    def getvalue(self) -> bytes:
+        """Return the whole upload as bytes (reads the spill file if needed)"""
+        if self._stream is not None:
+            self._stream.seek(0)
+            return self._stream.read()
+        if self.path is None:
+            return bytes(self._buffer)
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def reader(self) -> BinaryIO:
+        """A seekable binary file over the upload, e.g. for zipfile"""
+        if self._stream is not None:
+            return self._stream
+        if self.path is not None:
+            return open(self.path, "rb")
+        return io.BytesIO(self._buffer)
+
+    def close(self):
+        """Release memory and remove the spill file"""
+        self._buffer = bytearray()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+            self.path = None
+
+
+def is_cv_filename(filename: Optional[str]) -> bool:
+    """Whether the file name has one of the supported CV extensions"""
+    return bool(filename) and filename.lower().endswith(CV_EXTENSIONS)
+
+
+def check_upload_format(upload: SpooledUpload):
+    """415 for a CV whose content doesn't match its extension or can't be read"""
+    try:
+        check_format(upload.filename, upload.head)
+    except UnsupportedDocument as e:
+        CV_REJECTED.inc(status="415")
+        raise HTTPException(status_code=415, detail=str(e))
+
+
+def _too_large(max_size: int) -> HTTPException:
+    CV_REJECTED.inc(status="413")
+    return HTTPException(
+        status_code=413,
+        detail=f"File size must be less than {max_size // (1024 * 1024)}MB",
+    )
+
+
+async def read_upload(
+    file: UploadFile,
+    max_size: int = MAX_UPLOAD_BYTES,
+    chunk_size: int = CHUNK_SIZE,
+    spool_threshold: int = SPOOL_THRESHOLD,
+) -> SpooledUpload:
+    """
+    Read an UploadFile chunk by chunk, enforcing max_size incrementally.
+    For files Starlette has already spooled from a form, use adopt_upload().
+    """
+    upload = SpooledUpload(file.filename or "", spool_threshold)
+    try:
+        with span("upload_read"):
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                if upload.size + len(chunk) > max_size:
+                    raise _too_large(max_size)
+                upload.write(chunk)
+        upload.finish()
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+
+def adopt_upload(file: UploadFile, max_size: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """
+    Take over the file Starlette spooled for an UploadFile (in memory up to
+    1MB, on disk beyond) instead of copying it. The UploadFile is left with
+    an empty file, so closing the form, which newer FastAPI versions do
+    before a streaming response runs, no longer closes the upload.
+    """
+    stream, file.file = file.file, io.BytesIO()
+    upload = SpooledUpload.from_stream(file.filename or "", stream)
+    if upload.size > max_size:
+        upload.close()
+        raise _too_large(max_size)
+    return upload
+
+
+def list_zip_cvs(archive: zipfile.ZipFile) -> List[zipfile.ZipInfo]:
+    """CV files inside an uploaded zip, skipping folders and macOS metadata"""
+    return [
+        info
+        for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith("__MACOSX/")
+        and not Path(info.filename).name.startswith(".")
+        and is_cv_filename(info.filename)
+    ]
+
+
+def read_zip_member(
+    archive: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    max_size: int = MAX_UPLOAD_BYTES,
+    spool_threshold: int = SPOOL_THRESHOLD,
+) -> SpooledUpload:
+    """
+    Decompress one zip member into a SpooledUpload. The size cap is enforced
+    on the decompressed stream rather than the (untrusted) zip header.
+    """
+    upload = SpooledUpload(Path(info.filename).name, spool_threshold)
+    try:
+        with span("upload_read"), archive.open(info) as member:
+            while True:
+                chunk = member.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if upload.size + len(chunk) > max_size:
+                    raise _too_large(max_size)
+                upload.write(chunk)
+        upload.finish()
+    except BaseException:
+        upload.close()
+        raise
+    return upload
+
+
+class RequestTooLarge(HTTPException):
+    # An HTTPException so FastAPI's body parsing re-raises it as a 413
+    # instead of wrapping it into a generic 400
+    def __init__(self, limit: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Request body must be less than {limit // (1024 * 1024)}MB",
+        )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject request bodies over a per-path limit before they are buffered.
+
+    A declared Content-Length over the limit is refused straight away;
+    chunked bodies are counted as they stream in and cut off with 413 the
+    moment they cross it, before form parsing spools the rest.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                await self._reject(send, limit)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise RequestTooLarge(limit)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if not response_started:
+                await self._reject(send, limit)
+
+    async def _reject(self, send, limit: int):
+        body = json.dumps({"detail": RequestTooLarge(limit).detail}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})